@@ -12,6 +12,8 @@ const EXPORT_WIDTH: int = 1200
 const EXPORT_HEIGHT: int = 900
 const MAX_UNDO: int = 20
 const TOLERANCE: int = 50  # Color tolerance for flood fill
+const THUMB_SIZE: int = 100  # Template selector button size
+const TEMPLATE_MANIFEST: String = "res://assets/textures/coloring_templates/templates.json"
 
 ## Color Palette (same as FingerPaint) ##
 const COLORS: Array[Color] = [
@@ -48,11 +50,19 @@ var canvas_image: Image
 var template_image: Image
 var current_color: Color = Color.RED
 var current_template: Dictionary = {}
-var undo_stack: Array[Image] = []
+# Image snapshots (flood fill) or {"region", "color"} records (region fill)
+var undo_stack: Array = []
 var color_buttons: Array[Button] = []
 var template_buttons: Array[TextureButton] = []
 var is_transitioning: bool = false
 
+# Precomputed regions from tools/label_regions.py; empty when a template has none
+var region_labels: Image
+var region_label_rgb: bool = false
+var region_spans: Dictionary = {}   # id -> PackedInt32Array [y, x0, x1, ...]
+var region_pixels: Dictionary = {}  # id -> pixel count
+var region_colors: Dictionary = {}  # id -> current fill colour
+
 var _fills_done: int = 0
 var _target_fills: int = 10
 var _goal_rewarded: bool = false
@@ -110,7 +120,11 @@ func load_template(template_data: Dictionary) -> void:
 # Undo last action
 func undo() -> void:
 	if undo_stack.size() > 0:
-		canvas_image = undo_stack.pop_back()
+		var entry = undo_stack.pop_back()
+		if entry is Image:
+			canvas_image = entry
+		else:
+			_paint_region(entry["region"], entry["color"])
 		_update_canvas_texture()
 		AudioManager.play_sfx("gentle.ogg")
 
@@ -170,15 +184,25 @@ func _setup_canvas() -> void:
 func _setup_template_selector() -> void:
 	template_list = $GameContainer/GameContent/TemplateSelector/TemplateScroll/TemplateList
 
+	# Thumbnails written by tools/create_templates.py; the full template is
+	# only loaded once one is picked.
+	var thumbnails := {}
+	if FileAccess.file_exists(TEMPLATE_MANIFEST):
+		var manifest = JSON.parse_string(FileAccess.get_file_as_string(TEMPLATE_MANIFEST))
+		if manifest is Dictionary:
+			thumbnails = manifest.get("templates", {})
+
 	# Create template buttons
 	for template_data in TEMPLATES:
 		var btn = TextureButton.new()
-		btn.custom_minimum_size = Vector2(100, 100)
+		btn.custom_minimum_size = Vector2(THUMB_SIZE, THUMB_SIZE)
 		btn.stretch_mode = TextureButton.STRETCH_KEEP_ASPECT_CENTERED
 		btn.ignore_texture_size = true
 
-		# Load template thumbnail as Texture2D (export-safe)
-		var tex_path: String = template_data.get("path", "")
+		# Load template thumbnail as Texture2D (export-safe), falling back to the full image
+		var tex_path: String = thumbnails.get(template_data["id"], {}).get("thumbnail", "")
+		if tex_path.is_empty() or not ResourceLoader.exists(tex_path):
+			tex_path = template_data.get("path", "")
 		if not tex_path.is_empty() and ResourceLoader.exists(tex_path):
 			btn.texture_normal = load(tex_path)
 
@@ -263,22 +287,78 @@ func _load_template_image(path: String) -> void:
 		push_error("Failed to load template image data: ", path)
 		return
 	template_image = img
+	template_image.convert(Image.FORMAT_RGBA8)
 
-	# Resize template to canvas size
-	template_image.resize(CANVAS_WIDTH, CANVAS_HEIGHT, Image.INTERPOLATE_NEAREST)
+	# tools/create_templates.py renders templates at exactly the canvas size;
+	# only resize stale or hand-made ones.
+	if template_image.get_size() != Vector2i(CANVAS_WIDTH, CANVAS_HEIGHT):
+		push_warning("Template is not %dx%d, resizing: %s" % [CANVAS_WIDTH, CANVAS_HEIGHT, path])
+		template_image.resize(CANVAS_WIDTH, CANVAS_HEIGHT, Image.INTERPOLATE_NEAREST)
 
-	# Clear canvas and draw template
+	# Clear canvas and copy template onto it
 	canvas_image.fill(Color.WHITE)
+	canvas_image.blit_rect(template_image, Rect2i(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT), Vector2i.ZERO)
 
-	# Copy template to canvas
-	for y in range(CANVAS_HEIGHT):
-		for x in range(CANVAS_WIDTH):
-			var pixel = template_image.get_pixel(x, y)
-			canvas_image.set_pixel(x, y, pixel)
-
+	_load_regions(path)
 	_update_canvas_texture()
 	_clear_undo_stack()
 
+# Load <id>.regions.png/.json written by tools/label_regions.py.
+# Without them (or on a size mismatch) taps fall back to _flood_fill.
+func _load_regions(path: String) -> void:
+	region_labels = null
+	region_spans.clear()
+	region_pixels.clear()
+	region_colors.clear()
+
+	var base := path.get_basename()
+	var labels_path := base + ".regions.png"
+	var meta_path := base + ".regions.json"
+	if not ResourceLoader.exists(labels_path) or not FileAccess.file_exists(meta_path):
+		return
+	var meta = JSON.parse_string(FileAccess.get_file_as_string(meta_path))
+	if not (meta is Dictionary) or meta.get("size", []) != [float(CANVAS_WIDTH), float(CANVAS_HEIGHT)]:
+		push_warning("Region map does not match the canvas, using flood fill: ", meta_path)
+		return
+	var tex := load(labels_path)
+	if not (tex is Texture2D):
+		return
+	region_labels = (tex as Texture2D).get_image()
+	region_label_rgb = meta.get("encoding", "L8") == "RGB8"
+	for region in meta.get("regions", []):
+		var id := int(region["id"])
+		region_spans[id] = PackedInt32Array(region["spans"])
+		region_pixels[id] = int(region["pixels"])
+
+func _region_at(x: int, y: int) -> int:
+	var c := region_labels.get_pixel(x, y)
+	if region_label_rgb:
+		return c.r8 | (c.g8 << 8) | (c.b8 << 16)
+	return c.r8
+
+# Fill the tapped region from its span list; records only (region, previous colour) for undo.
+# Returns number of pixels changed.
+func _fill_region(x: int, y: int, fill_color: Color) -> int:
+	var id := _region_at(x, y)
+	if id == 0 or not region_spans.has(id):
+		return 0
+	var previous: Color = region_colors.get(id, Color.WHITE)
+	if _colors_match(previous, fill_color):
+		return 0
+
+	undo_stack.append({"region": id, "color": previous})
+	if undo_stack.size() > MAX_UNDO:
+		undo_stack.pop_front()
+
+	_paint_region(id, fill_color)
+	return region_pixels[id]
+
+func _paint_region(id: int, color: Color) -> void:
+	var spans: PackedInt32Array = region_spans[id]
+	for i in range(0, spans.size(), 3):
+		canvas_image.fill_rect(Rect2i(spans[i + 1], spans[i], spans[i + 2] - spans[i + 1], 1), color)
+	region_colors[id] = color
+
 # Handle canvas click for flood fill
 func _handle_canvas_click(event: InputEventMouseButton) -> void:
 	var local_pos = canvas.get_local_mouse_position()
@@ -290,11 +370,15 @@ func _handle_canvas_click(event: InputEventMouseButton) -> void:
 	var x = int(local_pos.x)
 	var y = int(local_pos.y)
 
-	# Save state for undo
-	_save_to_undo_stack()
+	var filled := 0
+	if region_labels:
+		filled = _fill_region(x, y, current_color)
+	else:
+		# Save state for undo
+		_save_to_undo_stack()
 
-	# Perform flood fill (count pixels changed)
-	var filled := _flood_fill(canvas_image, x, y, current_color)
+		# Perform flood fill (count pixels changed)
+		filled = _flood_fill(canvas_image, x, y, current_color)
 	_update_canvas_texture()
 
 	# Feedback
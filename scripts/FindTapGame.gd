@@ -58,7 +58,7 @@ func _load_theme(path: String) -> void:
 		# Optional background override per theme
 		var bg_path: String = theme_data.get("background", "")
 		if background and not bg_path.is_empty() and ResourceLoader.exists(bg_path):
-			background.texture = load(bg_path)
+			background.texture = TieredBackground.load_texture(bg_path)
 
 func _build_grid() -> void:
 	# Clear old
@@ -172,16 +172,23 @@ func _start_song() -> void:
 	tapped_beats.clear()
 	active_particles.clear()
 
-	# Generate beat timestamps (1 second intervals starting from 0.5s)
+	# Beat timestamps: precomputed index from tools/detect_beats.py if present,
+	# otherwise 1 second intervals starting from 0.5s
 	beat_timestamps.clear()
-	for i in range(total_beats):
-		beat_timestamps.append(0.5 + (i * BEAT_INTERVAL))
+	var indexed_beats := _load_beat_index(current_song.path)
+	if indexed_beats.is_empty():
+		for i in range(total_beats):
+			beat_timestamps.append(0.5 + (i * BEAT_INTERVAL))
+	else:
+		beat_timestamps.assign(indexed_beats)
+		total_beats = beat_timestamps.size()
+		_update_hud()
 
 	# Load and play music
 	var audio_stream = load(current_song.path)
 	if audio_stream:
 		music_player.stream = audio_stream
-		song_duration = audio_stream.get_length() if audio_stream is AudioStreamOggVorbis else float(total_beats) * BEAT_INTERVAL + 2.0
+		song_duration = audio_stream.get_length() if audio_stream is AudioStreamOggVorbis else _fallback_song_duration()
 
 		# Start playing
 		music_player.play()
@@ -196,7 +203,7 @@ func _start_song() -> void:
 	else:
 		push_error("RhythmGame._start_song: Failed to load audio stream from ", current_song.path)
 		# Use fallback timing
-		song_duration = float(total_beats) * BEAT_INTERVAL + 2.0
+		song_duration = _fallback_song_duration()
 		song_start_time = Time.get_unix_time_from_system()
 		is_playing = true
 
@@ -208,6 +215,28 @@ func _start_song() -> void:
 		add_child(timer)
 		timer.start()
 
+# Load "<song>.beats.json" written by tools/detect_beats.py; empty if missing
+func _load_beat_index(song_path: String) -> Array[float]:
+	var beats: Array[float] = []
+	var index_path := song_path.get_basename() + ".beats.json"
+	if not FileAccess.file_exists(index_path):
+		return beats
+	var f := FileAccess.open(index_path, FileAccess.READ)
+	if f == null:
+		# Unreadable index: fixed beats, with the usual song duration fallback
+		push_warning("RhythmGame._load_beat_index: cannot open ", index_path, ": ", error_string(FileAccess.get_open_error()))
+		return beats
+	var data = JSON.parse_string(f.get_as_text())
+	if typeof(data) == TYPE_DICTIONARY:
+		for t in data.get("beats", []):
+			beats.append(float(t))
+	return beats
+
+func _fallback_song_duration() -> float:
+	if beat_timestamps.is_empty():
+		return float(total_beats) * BEAT_INTERVAL + 2.0
+	return beat_timestamps.back() + 2.0
+
 # Update beat visuals (pulse on beat)
 func _update_beat_visuals() -> void:
 	var current_time = Time.get_unix_time_from_system() - song_start_time
@@ -0,0 +1,55 @@
+extends TextureRect
+
+## Full-screen background that loads the resolution tier suited to the device.
+## tools/make_background_variants.py writes 720p/540p copies of every 1080p
+## background and lists them in backgrounds.json; the first tier whose
+## max_screen_short_side and max_memory_mb both allow this device is used,
+## otherwise the master. Scenes set master_path instead of texture so the
+## 1080p master is never decoded on devices that get a smaller tier.
+
+class_name TieredBackground
+
+const MANIFEST_PATH := "res://assets/textures/backgrounds.json"
+
+@export_file("*.png") var master_path: String = ""
+
+static var _backgrounds: Dictionary = {}
+static var _tier: String = ""
+
+func _ready() -> void:
+	if not master_path.is_empty():
+		texture = load_texture(master_path)
+
+# Texture for a background master, in this device's tier when one exists
+static func load_texture(path: String) -> Texture2D:
+	var variant: String = tier_path(path)
+	if variant != path and ResourceLoader.exists(variant):
+		return load(variant)
+	return load(path)
+
+# res:// path of the tier variant for a master, or the master itself
+static func tier_path(path: String) -> String:
+	if _tier.is_empty():
+		_load_manifest()
+	var entry: Dictionary = _backgrounds.get(path, {})
+	return entry.get(_tier, {}).get("path", path)
+
+static func _load_manifest() -> void:
+	var tiers: Array = []
+	_tier = "1080p"
+	if FileAccess.file_exists(MANIFEST_PATH):
+		var f := FileAccess.open(MANIFEST_PATH, FileAccess.READ)
+		var data = JSON.parse_string(f.get_as_text()) if f else null
+		if typeof(data) == TYPE_DICTIONARY:
+			_backgrounds = data.get("backgrounds", {})
+			tiers = data.get("tiers", [])
+			_tier = data.get("default_tier", _tier)
+	var screen: Vector2i = DisplayServer.screen_get_size()
+	var short_side: int = mini(screen.x, screen.y)
+	var memory_mb: float = OS.get_memory_info().get("physical", -1) / 1048576.0
+	for tier in tiers:
+		if short_side <= int(tier.get("max_screen_short_side", 0)) \
+				and (memory_mb <= 0.0 or memory_mb <= float(tier.get("max_memory_mb", 0))):
+			_tier = tier.get("name", _tier)
+			break
+	print("TieredBackground: screen short side ", short_side, ", ", int(memory_mb), " MB -> ", _tier)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Benchmark the WAV converter against the old list-based implementation.
+
+Synthesizes a multi-minute stereo PCM WAV, converts it with both the
+vectorized stages in convert_wav_pcm_to_16bit_mono.py and the original
+per-sample Python loops, checks the outputs match and prints timings.
+
+Usage:
+  python3 tools/bench_convert_wav.py [--minutes 3] [--width 3] [--rate 44100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import struct
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import convert_wav_pcm_to_16bit_mono as conv
+
+
+# --- Reference: the original list-based stages --------------------------------
+
+def legacy_read_samples_pcm(w: wave.Wave_read):
+    nch = w.getnchannels()
+    sw = w.getsampwidth()
+    nframes = w.getnframes()
+    raw = w.readframes(nframes)
+
+    if sw == 1:
+        data = struct.unpack(f"<{nframes * nch}B", raw)
+        return nch, [x - 128 for x in data]
+    if sw == 2:
+        return nch, list(struct.unpack(f"<{nframes * nch}h", raw))
+    if sw == 3:
+        data = []
+        for i in range(0, len(raw), 3):
+            v = raw[i] | (raw[i + 1] << 8) | (raw[i + 2] << 16)
+            if v & 0x800000:
+                v -= 1 << 24
+            data.append(v)
+        return nch, data
+    if sw == 4:
+        return nch, list(struct.unpack(f"<{nframes * nch}i", raw))
+    raise SystemExit(f"Unsupported sample width: {sw}")
+
+
+def legacy_downmix_to_mono(nch: int, samples):
+    if nch == 1:
+        return samples
+    mono = []
+    for i in range(0, len(samples), nch):
+        s = 0
+        for c in range(nch):
+            s += samples[i + c]
+        mono.append(int(s / nch))
+    return mono
+
+
+def legacy_scale_to_int16(samples, sw_in: int):
+    max_in = conv.MAX_IN.get(sw_in, 32767)
+    out = []
+    for s in samples:
+        if s > max_in:
+            s = max_in
+        if s < -max_in - 1:
+            s = -max_in - 1
+        v = int(s / max_in * 32767)
+        if v > 32767:
+            v = 32767
+        if v < -32768:
+            v = -32768
+        out.append(v)
+    return out
+
+
+# --- Harness ------------------------------------------------------------------
+
+def write_test_wav(path: pathlib.Path, seconds: float, rate: int, sw: int, nch: int = 2) -> None:
+    n = int(seconds * rate)
+    rng = np.random.default_rng(1234)
+    t = np.arange(n) / rate
+    sig = 0.6 * np.sin(2 * np.pi * 220.0 * t)[:, None] + 0.3 * rng.standard_normal((n, nch))
+    sig = np.clip(sig, -1.0, 1.0)
+    max_in = conv.MAX_IN[sw]
+    ints = (sig * max_in).astype(np.int64).reshape(-1)
+
+    if sw == 1:
+        raw = (ints + 128).astype(np.uint8).tobytes()
+    elif sw == 3:
+        raw = ints.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        raw = ints.astype({2: "<i2", 4: "<i4"}[sw]).tobytes()
+
+    with wave.open(str(path), "wb") as o:
+        o.setnchannels(nch)
+        o.setsampwidth(sw)
+        o.setframerate(rate)
+        o.writeframes(raw)
+
+
+def run_legacy(path: pathlib.Path) -> bytes:
+    with wave.open(str(path), "rb") as w:
+        sw = w.getsampwidth()
+        nch, samples = legacy_read_samples_pcm(w)
+    out16 = legacy_scale_to_int16(legacy_downmix_to_mono(nch, samples), sw)
+    return struct.pack(f"<{len(out16)}h", *out16)
+
+
+def run_vectorized(path: pathlib.Path) -> bytes:
+    with wave.open(str(path), "rb") as w:
+        sw = w.getsampwidth()
+        nch, samples = conv.read_samples_pcm(w)
+    return conv.scale_to_int16(conv.downmix_to_mono(nch, samples), sw).tobytes()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=3.0, help="Length of the synthetic input")
+    ap.add_argument("--width", type=int, default=3, choices=[1, 2, 3, 4], help="Input sample width in bytes")
+    ap.add_argument("--rate", type=int, default=44100)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = pathlib.Path(tmp) / "bench_in.wav"
+        write_test_wav(src, args.minutes * 60.0, args.rate, args.width)
+        size_mb = src.stat().st_size / 1e6
+        print(f"Input: {args.minutes:g} min stereo {args.width * 8}-bit @ {args.rate} Hz ({size_mb:.1f} MB)")
+
+        t0 = time.perf_counter()
+        vec = run_vectorized(src)
+        t_vec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        old = run_legacy(src)
+        t_old = time.perf_counter() - t0
+
+    print(f"list-based : {t_old:8.3f} s")
+    print(f"vectorized : {t_vec:8.3f} s")
+    print(f"speedup    : {t_old / max(t_vec, 1e-9):8.1f}x")
+    print(f"identical  : {vec == old}")
+    return 0 if vec == old else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
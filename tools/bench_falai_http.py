@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Offline throughput benchmark for generate_assets_falai_http.py.
+
+Starts fake_fal_server.py on a free local port, writes a synthetic manifest
+(icons + backgrounds) into a temp folder and runs the real generator
+against it as a subprocess, with a private journal and prompt cache. It does
+one cold run per --concurrency value, then a warm rerun that should be
+served entirely from the cache. For each run it reports assets/minute,
+HTTP calls per asset as counted by the server, and the generator's peak
+RSS.
+
+Usage:
+  python3 tools/bench_falai_http.py [--assets 30] [--concurrency 1,4,8] [--latency uniform:1,3]
+                                    [--throttle-rate 0.02] [--error-rate 0.01] [--fail-rate 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any
+
+TOOLS = pathlib.Path(__file__).resolve().parent
+
+
+def write_manifest(path: pathlib.Path, out_dir: pathlib.Path, n: int, run: str) -> None:
+    assets = []
+    for i in range(n):
+        kind = "background" if i % 6 == 0 else "icon"
+        assets.append({
+            "id": f"{kind}_{i:03d}",
+            "type": kind,
+            "out": str(out_dir / f"{kind}_{i:03d}.png"),
+            # run tag keeps cold runs from hitting each other's cache entries
+            "prompt": f"Benchmark {kind} {i} ({run}), flat pastel cartoon, no text.",
+            "negative": "text, watermark",
+        })
+    manifest = {
+        "style": {"model": "fal-ai/gpt-image-1.5"},
+        "outputs": {"icons": {"size": [256, 256]}, "background": {"size": [1080, 1920]}},
+        "assets": assets,
+    }
+    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def server_call(url: str, method: str = "GET") -> dict[str, Any]:
+    req = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(req, timeout=10) as r:
+        return json.loads(r.read())
+
+
+def run_generator(manifest: pathlib.Path, queue_url: str, tmp: pathlib.Path, concurrency: int,
+                  extra_env: dict[str, str]) -> tuple[float, int, float]:
+    """Run the generator; returns (wall seconds, exit code, peak RSS in MB)."""
+    env = {**os.environ, "FAL_KEY": "fake", **extra_env}
+    cmd = [sys.executable, str(TOOLS / "generate_assets_falai_http.py"), str(manifest),
+           "--queue-url", queue_url, "--journal", str(tmp / "journal.json"), "--concurrency", str(concurrency)]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss_mb = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    return wall, proc.returncode, rss_mb
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--assets", type=int, default=30)
+    ap.add_argument("--concurrency", default="1,4,8", help="Comma-separated values to compare")
+    ap.add_argument("--latency", default="uniform:1,3", help="Fake generation time (see fake_fal_server.py)")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--image-size", default=None)
+    args = ap.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+
+    server_cmd = [sys.executable, str(TOOLS / "fake_fal_server.py"), "--port", "0", "--latency", args.latency,
+                  "--fail-rate", str(args.fail_rate), "--throttle-rate", str(args.throttle_rate),
+                  "--error-rate", str(args.error_rate)]
+    if args.image_size:
+        server_cmd += ["--image-size", args.image_size]
+    server = subprocess.Popen(server_cmd, stdout=subprocess.PIPE, text=True)
+    try:
+        assert server.stdout is not None
+        queue_url = server.stdout.readline().split()[-1]
+        print(f"Fake fal at {queue_url}, {args.assets} assets, latency {args.latency}")
+        print(f"{'run':>10s} {'wall s':>8s} {'assets/min':>11s} {'calls/asset':>12s} {'peak MB':>8s}  calls")
+
+        with tempfile.TemporaryDirectory() as tmp_s:
+            tmp = pathlib.Path(tmp_s)
+            env = {"FAL_CACHE_DIR": str(tmp / "cache")}
+            runs = [(f"c={c}", c, f"c{c}") for c in levels] + [(f"warm c={levels[-1]}", levels[-1], f"c{levels[-1]}")]
+            for label, concurrency, tag in runs:
+                manifest = tmp / f"manifest_{tag}.json"
+                write_manifest(manifest, tmp / "out" / tag, args.assets, tag)
+                (tmp / "journal.json").unlink(missing_ok=True)
+                server_call(f"{queue_url}/__reset", "POST")
+                wall, code, rss = run_generator(manifest, queue_url, tmp, concurrency, env)
+                calls = server_call(f"{queue_url}/__stats")["calls"]
+                total = sum(v for k, v in calls.items() if k not in {"throttled", "errors"})
+                status = "" if code == 0 else f"  (exit {code})"
+                print(f"{label:>10s} {wall:8.2f} {args.assets / wall * 60:11.1f} {total / args.assets:12.2f} "
+                      f"{rss:8.1f}  {json.dumps(calls, sort_keys=True)}{status}")
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
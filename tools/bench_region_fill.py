@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Compare ColoringGame's per-pixel flood fill with precomputed region lookups.
+
+For every template in assets/textures/coloring_templates (or given paths)
+this picks --taps random non-outline pixels (seeded) and fills each of them
+two ways on a fresh canvas:
+
+  flood   a straight port of ColoringGame._flood_fill: a stack of dicts, a
+          visited dict keyed by "x,y" strings, and a _colors_match test on
+          every popped pixel. Absolute numbers are CPython, not GDScript, but
+          both interpreters pay per pixel the same way.
+  lookup  label_regions.py's label map plus span list: read one id, then one
+          slice assignment per span (fill_rect in the game).
+
+It checks that both fill exactly the same pixels and reports the mean and
+worst time per tap. It also reports undo cost per step: a full canvas copy
+today versus a (region id, previous colour) record.
+
+Usage:
+  python3 tools/bench_region_fill.py [--taps 10] [--seed 1] [templates ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from label_regions import TEMPLATES, label_template, template_files
+
+BLACK = (0.0, 0.0, 0.0)
+# One Color (4 floats) plus an int id, as a GDScript Dictionary entry.
+UNDO_RECORD_BYTES = 24
+
+
+def colors_match(c1: tuple[float, ...], c2: tuple[float, ...]) -> bool:
+    return abs(c1[0] - c2[0]) < 0.02 and abs(c1[1] - c2[1]) < 0.02 and abs(c1[2] - c2[2]) < 0.02
+
+
+def flood_fill(image: list[list[tuple[float, ...]]], start_x: int, start_y: int,
+               fill_color: tuple[float, ...]) -> int:
+    """Port of ColoringGame._flood_fill; returns pixels changed."""
+    target_color = image[start_y][start_x]
+    if colors_match(target_color, fill_color) or colors_match(target_color, BLACK):
+        return 0
+    height, width = len(image), len(image[0])
+    stack = [{"x": start_x, "y": start_y}]
+    visited = {}
+    filled_count = 0
+    while stack:
+        pos = stack.pop()
+        key = str(pos["x"]) + "," + str(pos["y"])
+        if key in visited:
+            continue
+        visited[key] = True
+        if pos["x"] < 0 or pos["x"] >= width or pos["y"] < 0 or pos["y"] >= height:
+            continue
+        if not colors_match(image[pos["y"]][pos["x"]], target_color):
+            continue
+        image[pos["y"]][pos["x"]] = fill_color
+        filled_count += 1
+        stack.append({"x": pos["x"] + 1, "y": pos["y"]})
+        stack.append({"x": pos["x"] - 1, "y": pos["y"]})
+        stack.append({"x": pos["x"], "y": pos["y"] + 1})
+        stack.append({"x": pos["x"], "y": pos["y"] - 1})
+    return filled_count
+
+
+def lookup_fill(canvas: np.ndarray, labels: np.ndarray, spans: dict[int, np.ndarray],
+                x: int, y: int, fill_color: np.ndarray) -> int:
+    region = int(labels[y, x])
+    if region == 0:
+        return 0
+    count = 0
+    for sy, x0, x1 in spans[region]:
+        canvas[sy, x0:x1] = fill_color
+        count += x1 - x0
+    return int(count)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark flood fill vs region lookup fill")
+    ap.add_argument("paths", nargs="*", help="Template PNGs or folders (default: coloring_templates)")
+    ap.add_argument("--taps", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+    fill = (1.0, 0.0, 0.0)
+
+    print(f"{'template':>10s} {'regions':>8s} {'flood ms':>9s} {'max':>8s} {'lookup ms':>10s} {'max':>7s} "
+          f"{'speedup':>8s} {'undo B/step':>18s}")
+    for path in template_files([pathlib.Path(p) for p in args.paths] or [TEMPLATES]):
+        with Image.open(path) as im:
+            im.load()
+        labels, regions = label_template(im)
+        spans = {r["id"]: np.asarray(r["spans"], np.int64).reshape(-1, 3) for r in regions}
+        rgba = np.asarray(im.convert("RGBA"))
+        h, w = labels.shape
+        rows = [[tuple(float(c) / 255 for c in px) for px in row] for row in rgba[..., :3].tolist()]
+        ys, xs = np.nonzero(labels)
+        taps = [(int(xs[i]), int(ys[i])) for i in (rng.randrange(len(xs)) for _ in range(args.taps))]
+
+        flood_t, lookup_t = [], []
+        for x, y in taps:
+            image = [list(r) for r in rows]
+            t0 = time.perf_counter()
+            n_flood = flood_fill(image, x, y, fill)
+            flood_t.append(time.perf_counter() - t0)
+
+            canvas = rgba.copy()
+            t0 = time.perf_counter()
+            n_lookup = lookup_fill(canvas, labels, spans, x, y, np.array([255, 0, 0, 255], np.uint8))
+            lookup_t.append(time.perf_counter() - t0)
+            if n_flood != n_lookup:
+                raise SystemExit(f"{path.name}: fill at ({x}, {y}) differs: flood {n_flood} px, lookup {n_lookup} px")
+
+        flood_ms, lookup_ms = statistics.mean(flood_t) * 1000, statistics.mean(lookup_t) * 1000
+        print(f"{path.stem:>10s} {len(regions):8d} {flood_ms:9.1f} {max(flood_t) * 1000:8.1f} {lookup_ms:10.3f} "
+              f"{max(lookup_t) * 1000:7.3f} {flood_ms / lookup_ms:7.0f}x {w * h * 4:>9d} -> {UNDO_RECORD_BYTES:<5d}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,120 +1,664 @@
 #!/usr/bin/env python3
-"""Convert PCM WAV (including 24-bit) to 16-bit mono WAV.
+"""Convert PCM/float WAV (including 24-bit) to 16-bit mono WAV.
 
 Godot's AudioStreamWAV support can be picky; 24-bit PCM often won't play.
-This script reads PCM WAV and writes 16-bit mono (44100 Hz preserved).
+This script reads PCM WAV and writes 16-bit mono (source rate preserved
+unless --rate is given).
+
+Input is parsed with a small RIFF reader that memory-maps the file and hands
+out zero-copy views of the data chunk. It accepts 8/16/24/32-bit PCM,
+32/64-bit IEEE float and WAVE_FORMAT_EXTENSIBLE headers (as written by DAWs
+and many TTS engines), which the stdlib `wave` module rejects.
+
+All sample stages work on whole NumPy arrays (no per-sample Python loops),
+so long music masters convert in a fraction of the time and memory.
+
+Prereqs:
+  python3 -m pip install --user numpy
 
 Usage:
   python3 tools/convert_wav_pcm_to_16bit_mono.py in.wav out.wav
+  python3 tools/convert_wav_pcm_to_16bit_mono.py --stream [--block-frames 65536] in.wav out.wav
+  python3 tools/convert_wav_pcm_to_16bit_mono.py --rate 22050 in.wav out.wav
+  python3 tools/convert_wav_pcm_to_16bit_mono.py --trim --index clip_index.json in.wav out.wav
+  python3 tools/convert_wav_pcm_to_16bit_mono.py [--jobs N] src_dir/ dst_dir/
+
+--stream reads, converts and writes fixed-size frame blocks, so peak memory
+stays constant regardless of input length. Output is byte-identical to the
+default whole-file path.
+
+When src is a directory every *.wav below it is converted (streaming) into
+the same relative path under dst, across a process pool. A cache file in dst
+records each input's content hash and the conversion settings; unchanged
+files are skipped on the next run.
+
+--rate resamples with a Kaiser-windowed sinc polyphase filter (anti-aliased,
+zero phase). It keeps filter state between blocks, so it works in --stream
+and directory mode as well.
+
+--trim cuts leading and trailing silence: 10 ms windows whose RMS is below
+--trim-threshold (dBFS) are dropped from both ends, keeping --trim-pad ms of
+context. A clip that is silent throughout fails instead of becoming an empty
+WAV; in directory mode its old output is left in place. --index writes a JSON sidecar with each clip's duration, trimmed
+start offset, peak and RMS loudness, so the game can schedule voice ducking
+without analysing audio at runtime.
 """
 
-import sys
-import wave
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import pathlib
 import struct
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Iterable, Iterator
 
+import numpy as np
 
-def read_samples_pcm(w: wave.Wave_read):
-    nch = w.getnchannels()
-    sw = w.getsampwidth()
-    nframes = w.getnframes()
-    raw = w.readframes(nframes)
+# Largest positive value per input sample width (bytes).
+MAX_IN = {1: 127, 2: 32767, 3: 8388607, 4: 2147483647}
+
+DEFAULT_BLOCK_FRAMES = 65536
+
+CACHE_NAME = ".wav_convert_cache.json"
+CACHE_VERSION = 2
+
+INDEX_VERSION = 1
+SILENCE_DBFS = -120.0
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavReader:
+    """Memory-mapped RIFF/WAVE reader exposing the data chunk without copying.
+
+    Offers the subset of the `wave.Wave_read` API used by this script;
+    readframes() returns a memoryview into the mapping instead of bytes.
+    An in-memory WAV (bytes) can be passed instead of a path.
+    """
+
+    def __init__(self, source: str | os.PathLike | bytes):
+        self._f = None
+        self._mm = None
+        if isinstance(source, (bytes, bytearray)):
+            name = "<memory>"
+            self._view = memoryview(source)
+        else:
+            name = str(source)
+            self._f = open(source, "rb")
+            try:
+                self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self._f.close()
+                raise SystemExit(f"Not a WAV file (empty): {name}")
+            self._view = memoryview(self._mm)
+        self._parse(name)
+        self._pos = 0
+
+    def _parse(self, path: str) -> None:
+        mm = self._view
+        if len(mm) < 12 or mm[0:4] != b"RIFF" or mm[8:12] != b"WAVE":
+            raise SystemExit(f"Not a RIFF/WAVE file: {path}")
+
+        fmt = None
+        data = None
+        pos = 12
+        while pos + 8 <= len(mm):
+            cid = mm[pos:pos + 4]
+            size = struct.unpack_from("<I", mm, pos + 4)[0]
+            body = pos + 8
+            if cid == b"fmt ":
+                fmt = bytes(mm[body:body + size])
+            elif cid == b"data":
+                # Streaming writers leave the size as 0 or 0xFFFFFFFF; clamp to the file.
+                if size == 0 or body + size > len(mm):
+                    size = len(mm) - body
+                data = (body, size)
+                break
+            pos = body + size + (size & 1)
+
+        if fmt is None or len(fmt) < 16:
+            raise SystemExit(f"Missing fmt chunk: {path}")
+        if data is None:
+            raise SystemExit(f"Missing data chunk: {path}")
+
+        tag, nch, rate, _byte_rate, block_align, bits = struct.unpack_from("<HHIIHH", fmt)
+        if tag == WAVE_FORMAT_EXTENSIBLE:
+            if len(fmt) < 26:
+                raise SystemExit(f"Truncated WAVE_FORMAT_EXTENSIBLE header: {path}")
+            # First two bytes of the SubFormat GUID carry the actual format tag.
+            tag = struct.unpack_from("<H", fmt, 24)[0]
+        if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise SystemExit(f"Unsupported WAV format tag 0x{tag:04x}: {path}")
+
+        sw = bits // 8
+        if nch <= 0 or block_align != nch * sw:
+            raise SystemExit(f"Unsupported WAV layout ({nch} ch, {bits} bit, align {block_align}): {path}")
+        if tag == WAVE_FORMAT_IEEE_FLOAT and sw not in (4, 8):
+            raise SystemExit(f"Unsupported float sample width: {sw}")
+
+        self.is_float = tag == WAVE_FORMAT_IEEE_FLOAT
+        self._nch = nch
+        self._sw = sw
+        self._rate = rate
+        self._offset, size = data
+        self._nframes = size // block_align
+
+    def getnchannels(self) -> int:
+        return self._nch
+
+    def getsampwidth(self) -> int:
+        return self._sw
+
+    def getframerate(self) -> int:
+        return self._rate
+
+    def getnframes(self) -> int:
+        return self._nframes
+
+    def readframes(self, n: int) -> memoryview:
+        n = max(0, min(n, self._nframes - self._pos))
+        align = self._nch * self._sw
+        start = self._offset + self._pos * align
+        self._pos += n
+        return self._view[start:start + n * align]
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            if self._mm is not None:
+                self._mm.close()
+        except BufferError:
+            # A caller still holds an array view; the mapping closes when it is collected.
+            pass
+        if self._f is not None:
+            self._f.close()
+
+    def __enter__(self) -> "WavReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def scale_width(w) -> int:
+    """Sample width the scale stage should assume; float input is decoded into the 32-bit range."""
+    return 4 if getattr(w, "is_float", False) else w.getsampwidth()
+
+
+def decode_pcm(raw: bytes, sw: int, is_float: bool = False) -> np.ndarray:
+    """Decode little-endian PCM/float bytes into a signed int32 array (interleaved)."""
+    if is_float:
+        x = np.frombuffer(raw, dtype="<f4" if sw == 4 else "<f8").astype(np.float64)
+        x = np.clip(np.nan_to_num(x), -1.0, 1.0)
+        return (x * MAX_IN[4]).astype(np.int32)
 
     if sw == 1:
-        # unsigned 8-bit
-        fmt = f"<{nframes * nch}B"
-        data = struct.unpack(fmt, raw)
-        # convert to signed centered
-        data = [x - 128 for x in data]
-        return nch, data
+        # unsigned 8-bit, convert to signed centered
+        return np.frombuffer(raw, dtype=np.uint8).astype(np.int32) - 128
 
     if sw == 2:
-        fmt = f"<{nframes * nch}h"
-        data = struct.unpack(fmt, raw)
-        return nch, list(data)
+        return np.frombuffer(raw, dtype="<i2").astype(np.int32)
 
     if sw == 3:
-        # signed 24-bit little-endian
-        data = []
-        for i in range(0, len(raw), 3):
-            b0 = raw[i]
-            b1 = raw[i + 1]
-            b2 = raw[i + 2]
-            v = b0 | (b1 << 8) | (b2 << 16)
-            # sign extend
-            if v & 0x800000:
-                v -= 1 << 24
-            data.append(v)
-        return nch, data
+        # signed 24-bit little-endian: place each byte triple in the top three
+        # bytes of an int32, then an arithmetic shift sign-extends it.
+        b = np.frombuffer(raw, dtype=np.uint8)
+        b = b[: len(b) - len(b) % 3].reshape(-1, 3)
+        wide = np.zeros((b.shape[0], 4), dtype=np.uint8)
+        wide[:, 1:] = b
+        return wide.view("<i4").reshape(-1) >> 8
 
     if sw == 4:
-        fmt = f"<{nframes * nch}i"
-        data = struct.unpack(fmt, raw)
-        return nch, list(data)
+        return np.frombuffer(raw, dtype="<i4").astype(np.int32)
 
     raise SystemExit(f"Unsupported sample width: {sw}")
 
 
-def downmix_to_mono(nch: int, samples):
+def read_samples_pcm(w: WavReader | wave.Wave_read):
+    nch = w.getnchannels()
+    sw = w.getsampwidth()
+    raw = w.readframes(w.getnframes())
+    return nch, decode_pcm(raw, sw, getattr(w, "is_float", False))
+
+
+def downmix_to_mono(nch: int, samples: np.ndarray) -> np.ndarray:
     if nch == 1:
         return samples
-    mono = []
-    for i in range(0, len(samples), nch):
-        s = 0
-        for c in range(nch):
-            s += samples[i + c]
-        mono.append(int(s / nch))
-    return mono
+    frames = samples[: len(samples) - len(samples) % nch].reshape(-1, nch)
+    s = frames.sum(axis=1, dtype=np.int64)
+    # Truncate toward zero, like int(s / nch).
+    return np.trunc(s / nch).astype(np.int64)
 
 
-def scale_to_int16(samples, sw_in: int):
+def scale_to_int16(samples: np.ndarray, sw_in: int) -> np.ndarray:
     # Determine max range based on input width
-    if sw_in == 1:
-        max_in = 127
-    elif sw_in == 2:
-        max_in = 32767
-    elif sw_in == 3:
-        max_in = 8388607
-    elif sw_in == 4:
-        max_in = 2147483647
-    else:
-        max_in = 32767
-
-    out = []
-    for s in samples:
-        # clamp
-        if s > max_in:
-            s = max_in
-        if s < -max_in - 1:
-            s = -max_in - 1
-        # scale to int16
-        v = int(s / max_in * 32767)
-        if v > 32767:
-            v = 32767
-        if v < -32768:
-            v = -32768
-        out.append(v)
-    return out
+    max_in = MAX_IN.get(sw_in, 32767)
+    s = np.clip(samples, -max_in - 1, max_in)
+    v = np.trunc(s / max_in * 32767)
+    return np.clip(v, -32768, 32767).astype("<i2")
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: convert_wav_pcm_to_16bit_mono.py in.wav out.wav")
-        return 2
+class Resampler:
+    """Rational-ratio polyphase resampler with a Kaiser-windowed sinc filter.
+
+    Feed mono blocks to process() and call flush() once at the end. Output is
+    aligned with the input (the filter delay is compensated) and has
+    ceil(n_in * dst_rate / src_rate) samples in total.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, zeros: int = 16, beta: float = 8.6, rolloff: float = 0.94):
+        g = math.gcd(src_rate, dst_rate)
+        self.up = L = dst_rate // g
+        self.down = M = src_rate // g
+
+        # Prototype low-pass at the upsampled rate L * src_rate.
+        n = 2 * zeros * max(L, M) + 1
+        fc = rolloff * 0.5 / max(L, M)
+        t = np.arange(n) - (n - 1) / 2
+        h = 2 * fc * np.sinc(2 * fc * t) * np.kaiser(n, beta) * L
+        self.delay = (n - 1) // 2
+
+        # Polyphase bank: bank[r, k] = h[r + k * L]
+        self.taps = K = -(-n // L)
+        padded = np.zeros(L * K)
+        padded[:n] = h
+        self.bank = padded.reshape(K, L).T.copy()
+
+        self._hist = np.zeros(K - 1)
+        self._n_in = 0
+        self._n_out = 0
+        self._limit: int | None = None
+
+    def process(self, x: np.ndarray, chunk: int = 16384) -> np.ndarray:
+        L, M, K = self.up, self.down, self.taps
+        buf = np.concatenate([self._hist, np.asarray(x, dtype=np.float64)])
+        base = self._n_in - (K - 1)  # global input index of buf[0]
+        self._n_in += len(x)
+        self._hist = buf[len(buf) - (K - 1):]
+
+        # Every output whose newest input sample has arrived.
+        n_end = max(self._n_out, (self._n_in * L - self.delay + M - 1) // M)
+        if self._limit is not None:
+            n_end = min(n_end, self._limit)
+
+        out = np.empty(n_end - self._n_out)
+        ks = np.arange(K)
+        for i in range(0, len(out), chunk):
+            n = np.arange(self._n_out + i, min(self._n_out + i + chunk, n_end))
+            p = n * M + self.delay
+            idx = (p // L - base)[:, None] - ks
+            out[i:i + len(n)] = np.einsum("nk,nk->n", buf[idx], self.bank[p % L])
+        self._n_out = n_end
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Drain the filter tail; total output length becomes ceil(n_in * L / M)."""
+        self._limit = -(-self._n_in * self.up // self.down)
+        return self.process(np.zeros(self.delay // self.up + 2))
+
+
+def iter_pcm_blocks(w: WavReader | wave.Wave_read, block_frames: int = DEFAULT_BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """Yield decoded interleaved samples, `block_frames` frames at a time."""
+    sw = w.getsampwidth()
+    is_float = getattr(w, "is_float", False)
+    while True:
+        raw = w.readframes(block_frames)
+        if not len(raw):
+            return
+        yield decode_pcm(raw, sw, is_float)
+
+
+def _dbfs(x: float) -> float:
+    return round(20 * math.log10(x / 32768), 2) + 0.0 if x > 0 else SILENCE_DBFS
+
 
-    src, dst = sys.argv[1], sys.argv[2]
-    with wave.open(src, "rb") as w:
+class SilenceTrimmer:
+    """Streaming leading/trailing silence trimmer for int16 mono blocks.
+
+    Windows are aligned to the start of the clip, so feeding the same samples
+    in any block sizes gives the same output. Silence after the first loud
+    window is held back until the next loud window (or dropped at flush()).
+    """
+
+    def __init__(self, rate: int, threshold_db: float = -50.0, pad_ms: float = 30.0, window_ms: float = 10.0):
+        self.window = max(1, int(rate * window_ms / 1000))
+        self.pad = int(rate * pad_ms / 1000)
+        self.threshold = 32768 * 10 ** (threshold_db / 20)
+        self.dropped_start = 0
+
+        self._partial = np.zeros(0, dtype="<i2")
+        self._pre = np.zeros(0, dtype="<i2")
+        self._held: list[np.ndarray] = []
+        self._started = False
+
+    def _trim(self, wins: np.ndarray) -> np.ndarray:
+        if len(wins) == 0:
+            return np.zeros(0, dtype="<i2")
+        loud = np.sqrt(np.mean(wins.astype(np.float64) ** 2, axis=1)) >= self.threshold
+        out: list[np.ndarray] = []
+
+        if not self._started:
+            if not loud.any():
+                pre = np.concatenate([self._pre, wins.reshape(-1)])
+                self.dropped_start += max(0, len(pre) - self.pad)
+                self._pre = pre[max(0, len(pre) - self.pad):]
+                return np.zeros(0, dtype="<i2")
+            first = int(np.argmax(loud))
+            pre = np.concatenate([self._pre, wins[:first].reshape(-1)])
+            self.dropped_start += max(0, len(pre) - self.pad)
+            out.append(pre[max(0, len(pre) - self.pad):])
+            self._pre = pre[:0]
+            self._started = True
+            wins, loud = wins[first:], loud[first:]
+
+        if not loud.any():
+            self._held.append(wins.reshape(-1))
+        else:
+            last = len(loud) - 1 - int(np.argmax(loud[::-1]))
+            out.extend(self._held)
+            out.append(wins[:last + 1].reshape(-1))
+            self._held = [wins[last + 1:].reshape(-1)]
+        return np.concatenate(out) if out else np.zeros(0, dtype="<i2")
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        buf = np.concatenate([self._partial, x])
+        n = len(buf) - len(buf) % self.window
+        self._partial = buf[n:]
+        return self._trim(buf[:n].reshape(-1, self.window))
+
+    def flush(self) -> np.ndarray:
+        out = self._trim(self._partial.reshape(1, -1)) if len(self._partial) else np.zeros(0, dtype="<i2")
+        self._partial = self._partial[:0]
+        tail = np.concatenate(self._held)[:self.pad] if self._held else np.zeros(0, dtype="<i2")
+        self._held = []
+        return np.concatenate([out, tail])
+
+
+class LoudnessMeter:
+    """Accumulates duration, peak and RMS over the int16 blocks actually written."""
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.peak = 0
+        self.sumsq = 0.0
+
+    def update(self, x: np.ndarray) -> np.ndarray:
+        if len(x):
+            self.samples += len(x)
+            self.peak = max(self.peak, int(np.max(np.abs(x.astype(np.int32)))))
+            self.sumsq += float(np.dot(x.astype(np.float64), x.astype(np.float64)))
+        return x
+
+    def stats(self, rate: int, trimmer: SilenceTrimmer | None = None) -> dict[str, Any]:
+        rms = math.sqrt(self.sumsq / self.samples) if self.samples else 0.0
+        return {
+            "duration": round(self.samples / rate, 4),
+            "trim_start": round(trimmer.dropped_start / rate, 4) if trimmer is not None else 0.0,
+            "peak_dbfs": _dbfs(self.peak),
+            "rms_dbfs": _dbfs(rms),
+        }
+
+
+def make_trimmer(rate: int, trim: dict[str, float] | None) -> SilenceTrimmer | None:
+    if not trim:
+        return None
+    return SilenceTrimmer(rate, threshold_db=trim["threshold_db"], pad_ms=trim["pad_ms"])
+
+
+def make_resampler(src_rate: int, rate: int | None) -> Resampler | None:
+    if not rate or rate == src_rate:
+        return None
+    return Resampler(src_rate, rate)
+
+
+def convert_blocks(blocks: Iterable[np.ndarray], nch: int, sw_in: int,
+                   resampler: Resampler | None = None,
+                   trimmer: SilenceTrimmer | None = None) -> Iterator[np.ndarray]:
+    """Downmix, resample, scale and trim each block; stateful stages carry over between blocks."""
+    for samples in blocks:
+        mono = downmix_to_mono(nch, samples)
+        if resampler is not None:
+            mono = resampler.process(mono)
+        out16 = scale_to_int16(mono, sw_in)
+        yield trimmer.process(out16) if trimmer is not None else out16
+    if resampler is not None:
+        out16 = scale_to_int16(resampler.flush(), sw_in)
+        yield trimmer.process(out16) if trimmer is not None else out16
+    if trimmer is not None:
+        yield trimmer.flush()
+
+
+def _require_sound(meter: LoudnessMeter, trim: dict[str, float] | None, name: str) -> None:
+    """Refuse a clip that trimming emptied, rather than publish a 0-frame WAV as a success."""
+    if trim is not None and meter.samples == 0:
+        raise SystemExit(f"Nothing above the {trim['threshold_db']} dBFS trim threshold: {name}")
+
+
+def convert_file(src: str, dst: str, rate: int | None = None, trim: dict[str, float] | None = None) -> dict[str, Any]:
+    with WavReader(src) as w:
         fr = w.getframerate()
-        sw = w.getsampwidth()
+        sw = scale_width(w)
         nch, samples = read_samples_pcm(w)
 
-    mono = downmix_to_mono(nch, samples)
-    out16 = scale_to_int16(mono, sw)
+    out_rate = rate or fr
+    resampler = make_resampler(fr, rate)
+    trimmer = make_trimmer(out_rate, trim)
+    meter = LoudnessMeter()
+    out16 = meter.update(np.concatenate(list(convert_blocks([samples], nch, sw, resampler, trimmer))))
+    _require_sound(meter, trim, src)
 
     with wave.open(dst, "wb") as o:
         o.setnchannels(1)
         o.setsampwidth(2)
-        o.setframerate(fr)
-        o.writeframes(struct.pack(f"<{len(out16)}h", *out16))
+        o.setframerate(out_rate)
+        o.writeframes(out16.tobytes())
+
+    return meter.stats(out_rate, trimmer)
+
+
+def convert_stream(src: str, dst: str, block_frames: int = DEFAULT_BLOCK_FRAMES, rate: int | None = None,
+                   trim: dict[str, float] | None = None) -> dict[str, Any]:
+    with WavReader(src) as w:
+        return convert_reader(w, dst, block_frames, rate, trim, name=src)
+
+
+def convert_reader(w: WavReader, dst: str, block_frames: int = DEFAULT_BLOCK_FRAMES, rate: int | None = None,
+                   trim: dict[str, float] | None = None, name: str | None = None) -> dict[str, Any]:
+    """Stream an open reader through the pipeline into dst; returns the clip stats.
+
+    name identifies the source in errors (default: dst).
+    """
+    with wave.open(str(dst), "wb") as o:
+        fr = w.getframerate()
+        out_rate = rate or fr
+        resampler = make_resampler(fr, rate)
+        trimmer = make_trimmer(out_rate, trim)
+        meter = LoudnessMeter()
+        o.setnchannels(1)
+        o.setsampwidth(2)
+        o.setframerate(out_rate)
+        blocks = convert_blocks(iter_pcm_blocks(w, block_frames), w.getnchannels(), scale_width(w), resampler, trimmer)
+        for out16 in blocks:
+            o.writeframes(meter.update(out16).tobytes())
+    try:
+        _require_sound(meter, trim, name or str(dst))
+    except SystemExit:
+        pathlib.Path(dst).unlink(missing_ok=True)
+        raise
+
+    return meter.stats(out_rate, trimmer)
+
+
+def file_digest(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_cache(path: pathlib.Path) -> dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_cache(path: pathlib.Path, files: dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def update_index(index_path: pathlib.Path, clips: dict[pathlib.Path, dict[str, Any]]) -> None:
+    """Merge per-clip stats into the JSON sidecar index, keyed by path relative to the index."""
+    try:
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    entries = data.get("clips", {}) if data.get("version") == INDEX_VERSION else {}
+    base = index_path.resolve().parent
+    for path, stats in clips.items():
+        entries[pathlib.Path(os.path.relpath(path.resolve(), base)).as_posix()] = stats
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_name(index_path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": INDEX_VERSION, "clips": entries}, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, index_path)
+
+
+def _convert_job(job: tuple[str, str, dict[str, Any], int]) -> tuple[str, dict[str, Any]]:
+    src, dst, settings, block_frames = job
+    pathlib.Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst + ".tmp"
+    try:
+        stats = convert_stream(src, tmp, block_frames, rate=settings.get("rate"), trim=settings.get("trim"))
+        os.replace(tmp, dst)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
+    return src, stats
+
+
+def convert_tree(src_root: pathlib.Path, dst_root: pathlib.Path, settings: dict[str, Any], *,
+                 jobs: int | None = None, block_frames: int = DEFAULT_BLOCK_FRAMES, force: bool = False,
+                 index_path: pathlib.Path | None = None) -> tuple[int, int, int]:
+    """Convert every *.wav under src_root into dst_root; returns (converted, skipped, failed).
+
+    A clip that fails to convert is reported and left out of the cache, so
+    the next run retries it; every clip that did convert is still cached.
+    """
+    cache_path = dst_root / CACHE_NAME
+    cache = {} if force else load_cache(cache_path)
+    new_cache: dict[str, Any] = {}
+    pending: dict[str, tuple[str, str, dict[str, Any], int]] = {}
+    pending_entries: dict[str, dict[str, Any]] = {}
+    skipped = converted = failed = 0
+
+    for src in sorted(src_root.rglob("*.wav")):
+        rel = src.relative_to(src_root).as_posix()
+        dst = dst_root / rel
+        st = src.stat()
+        entry = cache.get(rel)
+        fresh = entry is not None and entry.get("settings") == settings and dst.exists()
+
+        # Fast path: size and mtime unchanged, so the content hash is too.
+        if fresh and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            new_cache[rel] = entry
+            skipped += 1
+            continue
+
+        digest = file_digest(src)
+        fields = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "settings": settings}
+        if fresh and entry.get("sha256") == digest:
+            # Only the mtime moved (fresh clone, touch): keep the recorded stats.
+            new_cache[rel] = {**fields, **({"stats": entry["stats"]} if "stats" in entry else {})}
+            skipped += 1
+            continue
+        pending[rel] = (str(src), str(dst), settings, block_frames)
+        pending_entries[rel] = fields
+
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+                futures = {pool.submit(_convert_job, job): rel for rel, job in pending.items()}
+                for fut in as_completed(futures):
+                    rel = futures[fut]
+                    try:
+                        _, stats = fut.result()
+                    except (Exception, SystemExit) as e:  # WavReader reports bad input via SystemExit
+                        failed += 1
+                        print(f"Failed: {pending[rel][0]}: {e}")
+                        continue
+                    new_cache[rel] = {**pending_entries[rel], "stats": stats}
+                    converted += 1
+                    print(f"Converted: {pending[rel][0]}")
+    finally:
+        dst_root.mkdir(parents=True, exist_ok=True)
+        save_cache(cache_path, new_cache)
+    if index_path is not None:
+        update_index(index_path, {dst_root / rel: e["stats"] for rel, e in new_cache.items() if "stats" in e})
+    return converted, skipped, failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert PCM WAV to 16-bit mono WAV")
+    ap.add_argument("src", help="Input WAV")
+    ap.add_argument("dst", help="Output WAV")
+    ap.add_argument("--stream", action="store_true", help="Convert in fixed-size blocks (constant memory)")
+    ap.add_argument("--block-frames", type=int, default=DEFAULT_BLOCK_FRAMES, help="Frames per block in --stream mode")
+    ap.add_argument("--jobs", type=int, default=None, help="Worker processes for directory mode (default: all cores)")
+    ap.add_argument("--rate", type=int, default=None, help="Resample to this rate in Hz (default: keep source rate)")
+    ap.add_argument("--trim", action="store_true", help="Trim leading/trailing silence")
+    ap.add_argument("--trim-threshold", type=float, default=-50.0, help="Silence threshold in dBFS (window RMS)")
+    ap.add_argument("--trim-pad", type=float, default=30.0, help="Silence kept around the sound, in ms")
+    ap.add_argument("--index", default=None, help="JSON sidecar index to update with duration/peak/RMS per clip")
+    ap.add_argument("--force", action="store_true", help="Directory mode: ignore the cache and convert everything")
+    args = ap.parse_args()
+
+    if args.block_frames <= 0:
+        ap.error("--block-frames must be positive")
+    if args.rate is not None and args.rate <= 0:
+        ap.error("--rate must be positive")
+
+    if args.trim_pad < 0:
+        ap.error("--trim-pad must not be negative")
+
+    trim = {"threshold_db": args.trim_threshold, "pad_ms": args.trim_pad} if args.trim else None
+    index_path = pathlib.Path(args.index) if args.index else None
+
+    src = pathlib.Path(args.src)
+    if src.is_dir():
+        dst = pathlib.Path(args.dst)
+        if dst.resolve() == src.resolve():
+            ap.error("directory mode needs a destination different from the source")
+        settings = {"channels": 1, "sample_width": 2, "rate": args.rate, "trim": trim}
+        t0 = time.perf_counter()
+        converted, skipped, failed = convert_tree(src, dst, settings, jobs=args.jobs, block_frames=args.block_frames,
+                                                  force=args.force, index_path=index_path)
+        print(f"Converted {converted}, skipped {skipped} unchanged, {failed} failed "
+              f"in {time.perf_counter() - t0:.2f}s")
+        if failed:
+            return 1
+    else:
+        if args.stream:
+            stats = convert_stream(args.src, args.dst, args.block_frames, rate=args.rate, trim=trim)
+        else:
+            stats = convert_file(args.src, args.dst, rate=args.rate, trim=trim)
+        if index_path is not None:
+            update_index(index_path, {pathlib.Path(args.dst): stats})
 
     return 0
 
@@ -1,225 +1,182 @@
 """
 Create simple coloring template images for the Coloring Book game.
-Run with: python tools/create_templates.py
-"""
-
-from PIL import Image, ImageDraw
-import os
-
-def create_directory():
-    """Create the templates directory if it doesn't exist."""
-    os.makedirs("assets/textures/coloring_templates", exist_ok=True)
-
-def draw_rectangle(img, draw, x, y, w, h, color, thickness=3):
-    """Draw a rectangle outline."""
-    for i in range(thickness):
-        draw.rectangle([x+i, y+i, x+w-i, y+h-i], outline=color, width=1)
-
-def draw_circle_outline(img, draw, cx, cy, radius, color, thickness=3):
-    """Draw a circle outline."""
-    for i in range(thickness):
-        bbox = [cx-radius+i, cy-radius+i, cx+radius-i, cy+radius-i]
-        draw.ellipse(bbox, outline=color, width=1)
-
-def draw_ellipse_outline(img, draw, cx, cy, rx, ry, color, thickness=3):
-    """Draw an ellipse outline."""
-    for i in range(thickness):
-        factor = 1 - (i / thickness)
-        bbox = [cx-int(rx*factor), cy-int(ry*factor), cx+int(rx*factor), cy+int(ry*factor)]
-        draw.ellipse(bbox, outline=color, width=1)
-
-def draw_triangle_outline(img, draw, cx, cy, size, color, thickness=3):
-    """Draw a triangle outline."""
-    p1 = (cx, cy - size)
-    p2 = (cx - size, int(cy + size * 0.7))
-    p3 = (cx + size, int(cy + size * 0.7))
-
-    for i in range(thickness):
-        draw.polygon([p1, p2, p3], outline=color)
-
-def draw_diamond(img, draw, cx, cy, size, color, thickness=3):
-    """Draw a diamond shape."""
-    p1 = (cx, cy - size)
-    p2 = (cx + size, cy)
-    p3 = (cx, cy + size)
-    p4 = (cx - size, cy)
-
-    for _ in range(thickness):
-        draw.polygon([p1, p2, p3, p4], outline=color)
-
-def draw_simple_flower(img, draw, cx, cy, size, color, thickness=3):
-    """Draw a simple 8-petal flower."""
-    for i in range(8):
-        angle = (6.28 * i) / 8
-        import math
-        px = cx + int(math.cos(angle) * size)
-        py = cy + int(math.sin(angle) * size)
-        draw_ellipse_outline(img, draw, px, py, size // 2, size // 3, color, thickness)
-    draw_circle_outline(img, draw, cx, cy, size // 3, color, thickness)
-
-def create_batik_template():
-    """Create batik pattern template."""
-    img = Image.new("RGBA", (1200, 900), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
-    # Main border
-    draw_rectangle(img, draw, 50, 50, 1100, 800, (0, 0, 0, 255), 5)
-    draw_rectangle(img, draw, 100, 100, 1000, 700, (0, 0, 0, 255), 3)
-
-    # Diamond pattern center
-    draw_diamond(img, draw, 600, 450, 200, (0, 0, 0, 255), 3)
-
-    # Corner patterns
-    draw_simple_flower(img, draw, 150, 150, 60, (0, 0, 0, 255), 3)
-    draw_simple_flower(img, draw, 1050, 150, 60, (0, 0, 0, 255), 3)
-    draw_simple_flower(img, draw, 150, 750, 60, (0, 0, 0, 255), 3)
-    draw_simple_flower(img, draw, 1050, 750, 60, (0, 0, 0, 255), 3)
-
-    # Side patterns
-    for i in range(3):
-        y = 250 + i * 200
-        draw_circle_outline(img, draw, 150, y, 30, (0, 0, 0, 255), 2)
-        draw_circle_outline(img, draw, 1050, y, 30, (0, 0, 0, 255), 2)
-
-    img.save("assets/textures/coloring_templates/batik.png")
-    print("Created batik.png")
-
-def create_komodo_template():
-    """Create komodo dragon template."""
-    img = Image.new("RGBA", (1200, 900), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
-    # Body
-    draw_ellipse_outline(img, draw, 600, 500, 300, 150, (0, 0, 0, 255), 4)
-
-    # Head
-    draw_ellipse_outline(img, draw, 850, 450, 100, 80, (0, 0, 0, 255), 4)
-
-    # Snout
-    draw_rectangle(img, draw, 930, 440, 150, 40, (0, 0, 0, 255), 4)
-
-    # Legs
-    draw_ellipse_outline(img, draw, 450, 600, 60, 100, (0, 0, 0, 255), 4)
-    draw_ellipse_outline(img, draw, 550, 600, 60, 100, (0, 0, 0, 255), 4)
-    draw_ellipse_outline(img, draw, 700, 600, 60, 100, (0, 0, 0, 255), 4)
-    draw_ellipse_outline(img, draw, 800, 600, 60, 100, (0, 0, 0, 255), 4)
-
-    # Tail
-    draw_rectangle(img, draw, 300, 480, 250, 40, (0, 0, 0, 255), 4)
 
-    # Eye
-    draw_circle_outline(img, draw, 880, 430, 15, (0, 0, 0, 255), 3)
+The line art lives in tools/coloring_templates.json as a small vector DSL:
+each template is a list of shapes in design units (1200x900), e.g.
+["ellipse", cx, cy, rx, ry, stroke]. Every shape is drawn with one PIL call
+per output size at its true stroke width, scaled to that size, so outlines
+stay crisp instead of being resampled.
 
-    # Spots on body
-    for i in range(5):
-        x = 400 + i * 80
-        draw_circle_outline(img, draw, x, 500, 20, (0, 0, 0, 255), 2)
+<id>.png is rendered at exactly the CANVAS_WIDTH x CANVAS_HEIGHT declared in
+scripts/ColoringGame.gd, so the game can blit it without a runtime resize.
+Each --size WxH (default: the 1200x900 export size) adds <id>_WxH.png.
+Output is pure black on white with no anti-aliasing, which the game's
+colour-matching flood fill relies on.
 
-    img.save("assets/textures/coloring_templates/komodo.png")
-    print("Created komodo.png")
+<id>_thumb.png is a LANCZOS downscale of the largest render that fits the
+selector's THUMB_SIZE button. templates.json maps each id to its template
+and thumbnail, so the selector only decodes thumbnails and the full template
+is loaded when one is picked.
 
-def create_anggrek_template():
-    """Create orchid flower template."""
-    img = Image.new("RGBA", (1200, 900), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
-    # Stem
-    draw_rectangle(img, draw, 590, 700, 20, 200, (0, 0, 0, 255), 3)
-
-    # Leaves
-    draw_ellipse_outline(img, draw, 500, 750, 120, 50, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 700, 750, 120, 50, (0, 0, 0, 255), 3)
+Run with: python tools/create_templates.py [--size 1200x900 ...] [ids ...]
+"""
 
-    # Flower petals
-    draw_ellipse_outline(img, draw, 600, 400, 80, 150, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 500, 450, 80, 120, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 700, 450, 80, 120, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 550, 300, 60, 100, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 650, 300, 60, 100, (0, 0, 0, 255), 3)
+from __future__ import annotations
 
-    # Center
-    draw_circle_outline(img, draw, 600, 450, 40, (0, 0, 0, 255), 3)
-    draw_circle_outline(img, draw, 600, 450, 15, (0, 0, 0, 255), 2)
+import argparse
+import json
+import math
+import re
+from pathlib import Path
 
-    img.save("assets/textures/coloring_templates/anggrek.png")
-    print("Created anggrek.png")
+from PIL import Image, ImageDraw
 
-def create_joglo_template():
-    """Create Joglo house template."""
-    img = Image.new("RGBA", (1200, 900), (255, 255, 255, 255))
+ROOT = Path(__file__).resolve().parents[1]
+SPEC_PATH = Path(__file__).resolve().parent / "coloring_templates.json"
+OUT_DIR = ROOT / "assets" / "textures" / "coloring_templates"
+GAME_SCRIPT = ROOT / "scripts" / "ColoringGame.gd"
+MANIFEST_PATH = OUT_DIR / "templates.json"
+MANIFEST_VERSION = 1
+INK = (0, 0, 0, 255)
+PAPER = (255, 255, 255, 255)
+
+
+def game_const(name: str, script: Path = GAME_SCRIPT) -> int:
+    """An int constant as declared in ColoringGame.gd."""
+    m = re.search(rf"const {name}: int = (\d+)", script.read_text(encoding="utf-8"))
+    if not m:
+        raise SystemExit(f"{name} not found in {script}")
+    return int(m.group(1))
+
+
+def canvas_size() -> tuple[int, int]:
+    return game_const("CANVAS_WIDTH"), game_const("CANVAS_HEIGHT")
+
+
+def thumbnail(img: Image.Image, box: int) -> Image.Image:
+    """Scale img to fit a box x box button, keeping its aspect."""
+    s = box / max(img.size)
+    return img.resize((round(img.width * s), round(img.height * s)), Image.LANCZOS, reducing_gap=3.0)
+
+
+def res_path(path: Path) -> str:
+    return "res://" + path.resolve().relative_to(ROOT).as_posix()
+
+
+def parse_size(spec: str) -> tuple[int, int]:
+    w, _, h = spec.lower().partition("x")
+    return int(w), int(h)
+
+
+def expand(shape: list) -> list[list]:
+    """Lower compound shapes (flower) to primitives."""
+    if shape[0] != "flower":
+        return [shape]
+    _, cx, cy, dist, petals, prx, pry, center_r, stroke = shape
+    out = []
+    for i in range(petals):
+        angle = math.tau * i / petals
+        out.append(["ellipse", cx + round(math.cos(angle) * dist), cy + round(math.sin(angle) * dist),
+                    prx, pry, stroke])
+    out.append(["circle", cx, cy, center_r, stroke])
+    return out
+
+
+def draw_shape(draw: ImageDraw.ImageDraw, shape: list, s: float) -> None:
+    """Draw one primitive scaled by s, in a single call with its full stroke width."""
+    kind, *args = shape
+    width = max(1, round(args[-1] * s))
+
+    def pt(x: float, y: float) -> tuple[int, int]:
+        return round(x * s), round(y * s)
+
+    if kind == "rect":
+        x, y, w, h, _ = args
+        draw.rectangle([*pt(x, y), *pt(x + w, y + h)], outline=INK, width=width)
+    elif kind in ("circle", "ellipse"):
+        if kind == "circle":
+            cx, cy, rx, _ = args
+            ry = rx
+        else:
+            cx, cy, rx, ry, _ = args
+        draw.ellipse([*pt(cx - rx, cy - ry), *pt(cx + rx, cy + ry)], outline=INK, width=width)
+    elif kind == "triangle":
+        cx, cy, size, _ = args
+        draw.polygon([pt(cx, cy - size), pt(cx - size, cy + size * 0.7), pt(cx + size, cy + size * 0.7)],
+                     outline=INK, width=width)
+    elif kind == "diamond":
+        cx, cy, size, _ = args
+        draw.polygon([pt(cx, cy - size), pt(cx + size, cy), pt(cx, cy + size), pt(cx - size, cy)],
+                     outline=INK, width=width)
+    else:
+        raise ValueError(f"Unknown shape {kind!r}")
+
+
+def render(shapes: list[list], design: tuple[int, int], size: tuple[int, int]) -> Image.Image:
+    if size[0] * design[1] != size[1] * design[0]:
+        raise SystemExit(f"{size[0]}x{size[1]} does not match the {design[0]}x{design[1]} design aspect")
+    img = Image.new("RGBA", size, PAPER)
     draw = ImageDraw.Draw(img)
+    s = size[0] / design[0]
+    for shape in shapes:
+        for prim in expand(shape):
+            draw_shape(draw, prim, s)
+    return img
 
-    # Main roof pyramid
-    draw_triangle_outline(img, draw, 600, 200, 350, (0, 0, 0, 255), 4)
-
-    # Lower tier
-    draw_triangle_outline(img, draw, 600, 300, 400, (0, 0, 0, 255), 4)
-
-    # Base
-    draw_rectangle(img, draw, 200, 450, 800, 350, (0, 0, 0, 255), 4)
-
-    # Door
-    draw_rectangle(img, draw, 550, 550, 100, 250, (0, 0, 0, 255), 3)
 
-    # Windows
-    draw_rectangle(img, draw, 300, 500, 80, 80, (0, 0, 0, 255), 3)
-    draw_rectangle(img, draw, 820, 500, 80, 80, (0, 0, 0, 255), 3)
-
-    # Decorative elements
-    draw_rectangle(img, draw, 250, 450, 700, 20, (0, 0, 0, 255), 3)
-    draw_rectangle(img, draw, 300, 500, 600, 20, (0, 0, 0, 255), 2)
-
-    # Pillars
-    draw_rectangle(img, draw, 300, 500, 30, 300, (0, 0, 0, 255), 3)
-    draw_rectangle(img, draw, 870, 500, 30, 300, (0, 0, 0, 255), 3)
-
-    img.save("assets/textures/coloring_templates/joglo.png")
-    print("Created joglo.png")
-
-def create_melati_template():
-    """Create jasmine flower template."""
-    img = Image.new("RGBA", (1200, 900), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
-    import math
-
-    # Stem
-    draw_rectangle(img, draw, 590, 600, 20, 300, (0, 0, 0, 255), 3)
-
-    # Leaves
-    draw_ellipse_outline(img, draw, 480, 650, 100, 40, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 720, 700, 100, 40, (0, 0, 0, 255), 3)
-    draw_ellipse_outline(img, draw, 520, 750, 90, 35, (0, 0, 0, 255), 3)
-
-    # Jasmine flowers (multiple small flowers)
-    def draw_jasmine_flower(cx, cy):
-        # Small jasmine flower with 6 petals
-        for i in range(6):
-            angle = (6.28 * i) / 6
-            px = cx + int(math.cos(angle) * 25)
-            py = cy + int(math.sin(angle) * 25)
-            draw_circle_outline(img, draw, px, py, 20, (0, 0, 0, 255), 2)
-        # Center
-        draw_circle_outline(img, draw, cx, cy, 15, (0, 0, 0, 255), 2)
-
-    draw_jasmine_flower(600, 400)
-    draw_jasmine_flower(520, 480)
-    draw_jasmine_flower(680, 450)
-
-    img.save("assets/textures/coloring_templates/melati.png")
-    print("Created melati.png")
-
-def main():
+def main() -> None:
     """Create all template images."""
-    create_directory()
-
+    ap = argparse.ArgumentParser(description="Render Coloring Book templates from coloring_templates.json")
+    ap.add_argument("ids", nargs="*", help="Template ids (default: all)")
+    ap.add_argument("--size", action="append", default=None,
+                    help="Extra WxH output, repeatable (default: 1200x900)")
+    args = ap.parse_args()
+
+    spec = json.loads(SPEC_PATH.read_text(encoding="utf-8"))
+    design = tuple(spec["size"])
+    templates = spec["templates"]
+    unknown = set(args.ids) - set(templates)
+    if unknown:
+        raise SystemExit(f"Unknown template ids: {', '.join(sorted(unknown))}")
+    canvas = canvas_size()
+    thumb_box = game_const("THUMB_SIZE")
+    extras = [parse_size(s) for s in (args.size or ["1200x900"])]
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    entries = manifest.get("templates", {})
     print("Creating coloring templates...")
-    create_batik_template()
-    create_komodo_template()
-    create_anggrek_template()
-    create_joglo_template()
-    create_melati_template()
+    for tid in args.ids or templates:
+        shapes = templates[tid]
+        largest = render(shapes, design, canvas)
+        largest.save(OUT_DIR / f"{tid}.png")
+        names = [f"{tid}.png"]
+        for w, h in extras:
+            if (w, h) != canvas:
+                img = render(shapes, design, (w, h))
+                img.save(OUT_DIR / f"{tid}_{w}x{h}.png")
+                names.append(f"{tid}_{w}x{h}.png")
+                if w > largest.width:
+                    largest = img
+        thumb = thumbnail(largest, thumb_box)
+        thumb.save(OUT_DIR / f"{tid}_thumb.png")
+        names.append(f"{tid}_thumb.png")
+        entries[tid] = {
+            "path": res_path(OUT_DIR / f"{tid}.png"),
+            "size": list(canvas),
+            "thumbnail": res_path(OUT_DIR / f"{tid}_thumb.png"),
+            "thumbnail_size": list(thumb.size),
+        }
+        print("Created", ", ".join(names))
+
+    manifest = {"version": MANIFEST_VERSION, "templates": {k: entries[k] for k in templates if k in entries}}
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
 
     print("All templates created successfully!")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Offline onset/beat detection for RhythmGame songs.
+
+Reads each music WAV in streaming blocks (constant memory), computes a
+spectral-flux onset envelope with a vectorized STFT, estimates the tempo by
+autocorrelation and places beats with dynamic-programming beat tracking.
+The result is written as a compact JSON index next to the song
+(`twinkle_twinkle.wav` -> `twinkle_twinkle.beats.json`), which RhythmGame
+loads instead of assuming a fixed beat interval.
+
+Prereqs:
+  python3 -m pip install --user numpy
+
+Usage:
+  python3 tools/detect_beats.py assets/sounds/music
+  python3 tools/detect_beats.py [--jobs N] [--out DIR] [--min-bpm 50] [--max-bpm 200] song.wav ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from convert_wav_pcm_to_16bit_mono import MAX_IN, WavReader, downmix_to_mono, iter_pcm_blocks, scale_width
+
+INDEX_VERSION = 1
+N_FFT = 2048
+HOP = 512
+
+
+class SpectralFlux:
+    """Streaming log-magnitude spectral flux; frame t is centred on sample t * hop."""
+
+    def __init__(self, n_fft: int = N_FFT, hop: int = HOP):
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = np.hanning(n_fft)
+        self._carry = np.zeros(n_fft // 2)
+        self._prev: np.ndarray | None = None
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        buf = np.concatenate([self._carry, x])
+        if len(buf) < self.n_fft:
+            self._carry = buf
+            return np.zeros(0)
+        n = (len(buf) - self.n_fft) // self.hop + 1
+        frames = sliding_window_view(buf, self.n_fft)[::self.hop][:n]
+        mag = np.log1p(100.0 * np.abs(np.fft.rfft(frames * self.window, axis=1)))
+
+        prev = self._prev if self._prev is not None else np.zeros(mag.shape[1])
+        diff = np.diff(np.vstack([prev, mag]), axis=0)
+        self._prev = mag[-1]
+        self._carry = buf[n * self.hop:]
+        return np.maximum(diff, 0.0).sum(axis=1)
+
+    def flush(self) -> np.ndarray:
+        return self.process(np.zeros(self.n_fft // 2))
+
+
+def onset_envelope(path: pathlib.Path) -> tuple[np.ndarray, int, float]:
+    """Return (flux per hop, sample rate, duration in seconds)."""
+    sf = SpectralFlux()
+    parts = []
+    with WavReader(path) as w:
+        rate = w.getframerate()
+        nch = w.getnchannels()
+        full_scale = float(MAX_IN[scale_width(w)])
+        duration = w.getnframes() / rate
+        for samples in iter_pcm_blocks(w):
+            parts.append(sf.process(downmix_to_mono(nch, samples) / full_scale))
+    parts.append(sf.flush())
+    return np.concatenate(parts), rate, duration
+
+
+def pick_onsets(env: np.ndarray, rate: int, delta: float = 0.3) -> np.ndarray:
+    """Frames that are local maxima (±30 ms) and exceed the local mean (±100 ms) by delta."""
+    fps = rate / HOP
+    w_max = max(1, int(0.03 * fps))
+    w_mean = max(1, int(0.1 * fps))
+    local_max = sliding_window_view(np.pad(env, w_max, mode="edge"), 2 * w_max + 1).max(axis=1)
+    local_mean = sliding_window_view(np.pad(env, w_mean, mode="edge"), 2 * w_mean + 1).mean(axis=1)
+    return np.flatnonzero((env == local_max) & (env >= local_mean + delta) & (env > 0))
+
+
+def estimate_tempo(env: np.ndarray, rate: int, min_bpm: float, max_bpm: float, prior_bpm: float = 120.0) -> float:
+    """Autocorrelation tempo with a log-Gaussian prior (one octave wide) around prior_bpm."""
+    fps = rate / HOP
+    x = env - env.mean()
+    n = 1 << int(np.ceil(np.log2(2 * len(x) + 1)))
+    spec = np.fft.rfft(x, n)
+    acf = np.fft.irfft(spec * np.conj(spec), n)[:len(x)]
+
+    lags = np.arange(max(1, int(fps * 60 / max_bpm)), min(len(x) - 1, int(np.ceil(fps * 60 / min_bpm))) + 1)
+    if len(lags) < 3:
+        return prior_bpm
+    bpm = 60 * fps / lags
+    weighted = acf[lags] * np.exp(-0.5 * np.log2(bpm / prior_bpm) ** 2)
+    i = int(np.argmax(weighted))
+
+    # Parabolic interpolation around the peak for sub-frame lag resolution.
+    lag = float(lags[i])
+    if 0 < i < len(lags) - 1:
+        a, b, c = weighted[i - 1], weighted[i], weighted[i + 1]
+        denom = a - 2 * b + c
+        if denom != 0:
+            lag += 0.5 * (a - c) / denom
+    return 60 * fps / lag
+
+
+def track_beats(env: np.ndarray, period: float, tightness: float = 100.0) -> np.ndarray:
+    """Dynamic-programming beat tracker (Ellis 2007) over the onset envelope."""
+    n = len(env)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+
+    # Smooth with a Gaussian of width period / 32 and normalise.
+    sigma = max(period / 32, 1.0)
+    k = np.arange(-int(4 * sigma), int(4 * sigma) + 1)
+    local = np.convolve(env, np.exp(-0.5 * (k / sigma) ** 2), mode="same")
+    local = local / (local.std() or 1.0)
+
+    d_min, d_max = max(1, int(round(period / 2))), max(2, int(round(2 * period)))
+    offsets = np.arange(d_min, d_max + 1)
+    penalty = -tightness * np.log(offsets / period) ** 2
+
+    score = local.copy()
+    backlink = np.full(n, -1)
+    for t in range(d_min, n):
+        lo = max(0, t - d_max)
+        prev = score[lo:t - d_min + 1][::-1]  # prev[j] = score[t - d_min - j]
+        cand = prev + penalty[:len(prev)]
+        j = int(np.argmax(cand))
+        if cand[j] > 0:
+            score[t] = local[t] + cand[j]
+            backlink[t] = t - d_min - j
+
+    # Last beat: latest local maximum of the score that is reasonably strong.
+    peaks = np.flatnonzero((score[1:-1] >= score[:-2]) & (score[1:-1] >= score[2:])) + 1
+    if len(peaks) == 0:
+        return np.zeros(0, dtype=int)
+    strong = peaks[score[peaks] > 0.5 * np.median(score[peaks])]
+    t = int(strong[-1]) if len(strong) else int(peaks[-1])
+
+    beats = []
+    while t >= 0:
+        beats.append(t)
+        t = int(backlink[t])
+    beats = np.array(beats[::-1])
+
+    # Drop beats extrapolated into silence at either end.
+    keep = np.flatnonzero(local[beats] >= 0.1 * np.median(local[beats]))
+    return beats[keep[0]:keep[-1] + 1] if len(keep) else beats[:0]
+
+
+def analyse(path: pathlib.Path, min_bpm: float = 50.0, max_bpm: float = 200.0) -> dict[str, Any]:
+    env, rate, duration = onset_envelope(path)
+    fps = rate / HOP
+    bpm = estimate_tempo(env, rate, min_bpm, max_bpm)
+    beats = track_beats(env, 60 * fps / bpm)
+    onsets = pick_onsets(env, rate)
+    return {
+        "version": INDEX_VERSION,
+        "source": path.name,
+        "duration": round(duration, 3),
+        "tempo_bpm": round(bpm, 2),
+        "beats": [round(float(b) / fps, 3) for b in beats],
+        "onsets": [round(float(o) / fps, 3) for o in onsets],
+    }
+
+
+def index_path_for(src: pathlib.Path, out_dir: pathlib.Path | None) -> pathlib.Path:
+    return (out_dir or src.parent) / f"{src.stem}.beats.json"
+
+
+def _analyse_job(job: tuple[str, str, float, float]) -> tuple[str, int, float]:
+    src, dst, min_bpm, max_bpm = job
+    index = analyse(pathlib.Path(src), min_bpm, max_bpm)
+    out = pathlib.Path(dst)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(index, separators=(",", ":")) + "\n", encoding="utf-8")
+    os.replace(tmp, out)
+    return dst, len(index["beats"]), index["tempo_bpm"]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Detect beats in music WAVs and write *.beats.json indexes")
+    ap.add_argument("paths", nargs="+", help="WAV files or folders (folders are scanned for *.wav)")
+    ap.add_argument("--out", default=None, help="Output folder (default: next to each WAV)")
+    ap.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    ap.add_argument("--min-bpm", type=float, default=50.0)
+    ap.add_argument("--max-bpm", type=float, default=200.0)
+    args = ap.parse_args()
+
+    if not 0 < args.min_bpm < args.max_bpm:
+        ap.error("need 0 < --min-bpm < --max-bpm")
+
+    out_dir = pathlib.Path(args.out) if args.out else None
+    songs: list[pathlib.Path] = []
+    for p in map(pathlib.Path, args.paths):
+        songs.extend(sorted(p.glob("*.wav")) if p.is_dir() else [p])
+    if not songs:
+        raise SystemExit("No WAV files found")
+
+    jobs = [(str(s), str(index_path_for(s, out_dir)), args.min_bpm, args.max_bpm) for s in songs]
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs or os.cpu_count()) as pool:
+        for dst, n_beats, bpm in pool.map(_analyse_job, jobs):
+            print(f"Wrote: {dst} ({n_beats} beats, {bpm:g} BPM)")
+    print(f"Analysed {len(jobs)} songs in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
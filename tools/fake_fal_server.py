@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Local stand-in for the fal.ai queue API, for offline testing and benchmarks.
+
+Implements the endpoints generate_assets_falai_http.py uses:
+
+  POST /<model>                      -> {"request_id", "status_url", "response_url"}
+  GET  /<base>/requests/<id>/status  -> {"status": IN_QUEUE | IN_PROGRESS | COMPLETED | FAILED, ...}
+  GET  /<base>/requests/<id>         -> {"images": [{"url", "width", "height"}]}
+  GET  /files/<id>.png               -> PNG bytes
+
+plus GET /__stats (HTTP calls by kind) and POST /__reset for harnesses.
+
+Each job's generation time is drawn from --latency (fixed:S, uniform:A,B or
+lognormal:MEDIAN,SIGMA). --fail-rate makes jobs end FAILED. --throttle-rate
+and --error-rate answer any call with 429 + Retry-After or 503. Images are
+--image-size (default: the payload's image_size or aspect_ratio on a
+1024 px base) filled with noise, so PNG sizes and decode costs are realistic.
+
+Usage:
+  python3 tools/fake_fal_server.py --port 8787 --latency lognormal:8,0.5 --throttle-rate 0.02
+  python3 tools/generate_assets_falai_http.py --queue-url http://127.0.0.1:8787 ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import io
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from PIL import Image
+
+REQUEST_RE = re.compile(r"/requests/([0-9a-f]+)(/status)?$")
+FILE_RE = re.compile(r"^/files/([0-9a-f]+)\.png$")
+
+
+@dataclass
+class FakeJob:
+    ready_at: float
+    started_at: float
+    size: tuple[int, int]
+    fails: bool
+
+
+def parse_latency(spec: str):
+    """Return a zero-argument sampler (seconds) for fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA."""
+    kind, _, args = spec.partition(":")
+    vals = [float(v) for v in args.split(",") if v]
+    if kind == "fixed" and len(vals) == 1:
+        return lambda: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        return lambda: random.uniform(vals[0], vals[1])
+    if kind == "lognormal" and len(vals) == 2:
+        mu = math.log(vals[0])
+        return lambda: random.lognormvariate(mu, vals[1])
+    raise ValueError(f"Bad latency spec {spec!r}; use fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA")
+
+
+def parse_size(spec: str) -> tuple[int, int]:
+    w, _, h = spec.lower().partition("x")
+    return int(w), int(h)
+
+
+_noise_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _encode_noise(size: tuple[int, int]) -> bytes:
+    im = Image.effect_noise(size, 64).convert("RGBA")
+    buf = io.BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def noise_png(size: tuple[int, int]) -> bytes:
+    """Noise PNG of size, encoded once: concurrent first downloads wait for one encode."""
+    with _noise_lock:
+        return _encode_noise(size)
+
+
+class FakeFal:
+    def __init__(self, latency: str = "uniform:1,3", fail_rate: float = 0.0, throttle_rate: float = 0.0,
+                 error_rate: float = 0.0, image_size: str | None = None, seed: int | None = None):
+        self.sample_latency = parse_latency(latency)
+        self.fail_rate = fail_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.image_size = parse_size(image_size) if image_size else None
+        self.jobs: dict[str, FakeJob] = {}
+        self.calls: Counter = Counter()
+        self.lock = threading.Lock()
+        if seed is not None:
+            random.seed(seed)
+
+    def count(self, kind: str) -> None:
+        with self.lock:
+            self.calls[kind] += 1
+
+    def size_for(self, payload: dict[str, Any]) -> tuple[int, int]:
+        if self.image_size:
+            return self.image_size
+        if "image_size" in payload:
+            return parse_size(str(payload["image_size"]))
+        w, _, h = str(payload.get("aspect_ratio", "1:1")).partition(":")
+        aw, ah = float(w), float(h or 1)
+        return (1024, round(1024 * ah / aw)) if aw >= ah else (round(1024 * aw / ah), 1024)
+
+    def submit(self, payload: dict[str, Any]) -> str:
+        rid = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.jobs[rid] = FakeJob(now + self.sample_latency(), now, self.size_for(payload),
+                                     random.random() < self.fail_rate)
+        return rid
+
+    def status(self, rid: str) -> dict[str, Any]:
+        job = self.jobs[rid]
+        now = time.time()
+        if now < job.ready_at:
+            if now < job.started_at + 0.25 * (job.ready_at - job.started_at):
+                with self.lock:
+                    others = list(self.jobs.values())
+                ahead = sum(1 for j in others if now < j.ready_at < job.ready_at)
+                return {"status": "IN_QUEUE", "queue_position": ahead}
+            return {"status": "IN_PROGRESS"}
+        return {"status": "FAILED" if job.fails else "COMPLETED"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fal: FakeFal
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _send(self, code: int, body: bytes, content_type: str = "application/json",
+              headers: dict[str, str] | None = None) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, obj: Any, code: int = 200) -> None:
+        self._send(code, json.dumps(obj).encode("utf-8"))
+
+    def _chaos(self) -> bool:
+        """Maybe answer with a throttle or transient error; True when a response was sent."""
+        r = random.random()
+        if r < self.fal.throttle_rate:
+            self.fal.count("throttled")
+            self._send(429, b'{"detail":"rate limited"}', headers={"Retry-After": "1"})
+            return True
+        if r < self.fal.throttle_rate + self.fal.error_rate:
+            self.fal.count("errors")
+            self._send(503, b'{"detail":"unavailable"}')
+            return True
+        return False
+
+    def _base(self) -> str:
+        return f"http://{self.headers.get('Host', '%s:%d' % self.server.server_address[:2])}"
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/__reset":
+            with self.fal.lock:
+                self.fal.calls.clear()
+                self.fal.jobs.clear()
+            return self._json({"ok": True})
+        self.fal.count("submit")
+        if self._chaos():
+            return
+        rid = self.fal.submit(json.loads(body or b"{}"))
+        base = f"{self._base()}{self.path.rstrip('/')}"
+        self._json({"request_id": rid, "status_url": f"{base}/requests/{rid}/status",
+                    "response_url": f"{base}/requests/{rid}"})
+
+    def do_GET(self) -> None:
+        if self.path == "/__stats":
+            return self._json({"calls": dict(self.fal.calls), "jobs": len(self.fal.jobs)})
+
+        m = FILE_RE.match(self.path)
+        if m:
+            self.fal.count("download")
+            if self._chaos():
+                return
+            job = self.fal.jobs.get(m.group(1))
+            if job is None:
+                return self._json({"detail": "not found"}, 404)
+            return self._send(200, noise_png(job.size), "image/png")
+
+        m = REQUEST_RE.search(self.path)
+        if not m:
+            return self._json({"detail": "not found"}, 404)
+        rid, is_status = m.group(1), bool(m.group(2))
+        self.fal.count("status" if is_status else "result")
+        if self._chaos():
+            return
+        if rid not in self.fal.jobs:
+            return self._json({"detail": "request not found"}, 404)
+        st = self.fal.status(rid)
+        if is_status:
+            return self._json(st)
+        if st["status"] != "COMPLETED":
+            return self._json({"detail": f"request is {st['status']}"}, 400)
+        w, h = self.fal.jobs[rid].size
+        self._json({"images": [{"url": f"{self._base()}/files/{rid}.png", "width": w, "height": h,
+                                "content_type": "image/png"}]})
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients dropping keep-alive connections on exit is normal here.
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def serve(fal: FakeFal, host: str = "127.0.0.1", port: int = 0) -> Server:
+    handler = type("FakeFalHandler", (Handler,), {"fal": fal})
+    return Server((host, port), handler)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Fake fal.ai queue server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787, help="0 picks a free port")
+    ap.add_argument("--latency", default="uniform:1,3", help="fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of jobs that end FAILED")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls answered 429")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered 503")
+    ap.add_argument("--image-size", default=None, help="WxH of every image (default: from the payload)")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    try:
+        fal = FakeFal(args.latency, args.fail_rate, args.throttle_rate, args.error_rate, args.image_size, args.seed)
+    except ValueError as e:
+        ap.error(str(e))
+    server = serve(fal, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
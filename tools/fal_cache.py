@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of raw fal.ai generations.
+
+Shared by generate_assets_falai.py and generate_assets_falai_http.py, and by
+every fal_ai_asset_manifest*.json. A generation is keyed by job_key on
+sha256(model, prompt, negative, size or aspect ratio), the inputs both
+scripts take from a manifest asset, so an asset generated by either script
+is a cache hit for the other and identical prompts in different manifests
+are generated once. The raw image is stored at
+tools/fal/cache/<key>.png and resized into each manifest output on
+materialization. Changing only an output size therefore costs no
+generation, and editing one prompt costs exactly one.
+
+Downloads are read into a bounded in-memory buffer (read_image), decoded
+and resized in memory, and every file is published with a temp-file rename,
+so an interrupted run never leaves a truncated PNG behind. With trim_pad,
+transparent margins are cropped in the same pass (see trim_sprites.py).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import pathlib
+from typing import Any
+
+ROOT = pathlib.Path(__file__).resolve().parents[0]
+CACHE_DIR = pathlib.Path(os.environ.get("FAL_CACHE_DIR") or ROOT / "fal" / "cache")
+MAX_IMAGE_BYTES = 64 << 20
+CHUNK_BYTES = 1 << 16
+
+
+def size_hint(model: str, asset_type: str) -> tuple[str, str]:
+    """(payload field, value) for the generation size of an asset type.
+
+    gpt-image-1.5 validates image_size as 1024x1024, 1536x1024 or 1024x1536;
+    FLUX takes an aspect_ratio instead.
+    """
+    if "flux" in model:
+        return "aspect_ratio", "16:9" if asset_type == "background" else "1:1"
+    return "image_size", "1024x1536" if asset_type == "background" else "1024x1024"
+
+
+def job_key(model: str, prompt: str, negative: str | None, size_or_aspect: str) -> str:
+    blob = json.dumps([model, prompt, negative or "", size_or_aspect], ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def cache_path(key: str) -> pathlib.Path:
+    return CACHE_DIR / f"{key}.png"
+
+
+def lookup(key: str) -> pathlib.Path | None:
+    path = cache_path(key)
+    return path if path.exists() else None
+
+
+def read_image(resp: Any, max_bytes: int = MAX_IMAGE_BYTES) -> bytes:
+    """Read a streamed requests response (stream=True) into memory, refusing bodies over max_bytes."""
+    length = int(resp.headers.get("Content-Length") or 0)
+    if length > max_bytes:
+        raise RuntimeError(f"Image too large: {length} bytes (limit {max_bytes})")
+    buf = bytearray()
+    for chunk in resp.iter_content(CHUNK_BYTES):
+        buf += chunk
+        if len(buf) > max_bytes:
+            resp.close()
+            raise RuntimeError(f"Image too large: over {max_bytes} bytes")
+    if length and len(buf) != length and not resp.headers.get("Content-Encoding"):
+        raise RuntimeError(f"Truncated download: {len(buf)} of {length} bytes")
+    return bytes(buf)
+
+
+def write_atomic(path: pathlib.Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def store(key: str, data: bytes) -> pathlib.Path:
+    """Publish raw image bytes under key (temp file + rename, safe for concurrent runs)."""
+    path = cache_path(key)
+    write_atomic(path, data)
+    return path
+
+
+def render(data: bytes, target_size: list[int] | None = None) -> bytes:
+    """Return data resized to target_size as PNG, decoding in memory; unchanged without a target or Pillow."""
+    if not target_size:
+        return data
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+
+    tw, th = int(target_size[0]), int(target_size[1])
+    out = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as im:
+        im.resize((tw, th), Image.LANCZOS).save(out, format="PNG")
+    return out.getvalue()
+
+
+def materialize(key: str, out_path: pathlib.Path, target_size: list[int] | None = None,
+                data: bytes | None = None, trim_pad: int | None = None) -> None:
+    """Write the image for key to out_path in one atomic write, resized to target_size when given.
+
+    Pass `data` when the raw bytes are already in memory (fresh download) to
+    skip re-reading the cache file. With trim_pad, transparent margins are
+    cropped and a <stem>.trim.json sidecar is written (a stale one removed).
+    """
+    if data is None:
+        data = cache_path(key).read_bytes()
+    data = render(data, target_size)
+    meta = None
+    if trim_pad is not None:
+        import trim_sprites
+
+        data, meta = trim_sprites.trim_png_bytes(data, trim_pad)
+    write_atomic(out_path, data)
+
+    sidecar = out_path.with_name(f"{out_path.stem}.trim.json")
+    if meta is not None:
+        write_atomic(sidecar, (json.dumps(meta, separators=(",", ":")) + "\n").encode("utf-8"))
+    else:
+        sidecar.unlink(missing_ok=True)
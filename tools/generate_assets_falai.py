@@ -5,7 +5,13 @@ Reads tools/fal_ai_asset_manifest.json and calls fal-ai/gpt-image-1.
 
 Usage:
   export FAL_KEY=...
-  python3 tools/generate_assets_falai.py
+  python3 tools/generate_assets_falai.py [--trim-pad 2]
+
+Raw generations are shared with generate_assets_falai_http.py through the
+prompt-hash cache in fal_cache.py: an asset whose model, prompt, negative
+and size were generated before (by either script, from any manifest) is
+written from the cache without calling fal. --trim-pad crops transparent
+sprite margins while writing (see trim_sprites.py).
 
 Note: This script assumes the `fal_client` package is installed.
 Install:
@@ -14,12 +20,15 @@ Install:
 Docs (may change): https://fal.ai
 """
 
+import argparse
 import base64
 import json
 import os
 import pathlib
 import sys
 
+import fal_cache
+
 MANIFEST_PATH = pathlib.Path(__file__).with_name("fal_ai_asset_manifest.json")
 
 
@@ -30,17 +39,22 @@ def _require_env(name: str) -> str:
     return v
 
 
-def main() -> int:
-    _require_env("FAL_KEY")
+def asset_key(model: str, asset: dict) -> str:
+    """Cache key for a manifest asset; generate_assets_falai_http.py derives the same one."""
+    _, size = fal_cache.size_hint(model, asset["type"])
+    return fal_cache.job_key(model, asset["prompt"], asset.get("negative"), size)
 
-    try:
-        import fal_client  # type: ignore
-    except Exception as e:
-        print("fal_client not installed. Run: python3 -m pip install --user fal-client", file=sys.stderr)
-        raise
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Generate image assets with fal_client")
+    ap.add_argument("--trim-pad", type=int, default=None,
+                    help="Crop transparent margins to this padding and write *.trim.json (see trim_sprites.py)")
+    args = ap.parse_args()
 
     manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
     model = manifest["style"]["model"]
+    fal_client = None
+    generated = cached = 0
 
     for asset in manifest["assets"]:
         out_path = pathlib.Path(asset["out"])
@@ -57,67 +71,67 @@ def main() -> int:
             "negative_prompt": negative,
         }
 
-        # Size hints for fal-ai/gpt-image-1.5
-        # The endpoint validates `image_size` as one of: 1024x1024, 1536x1024, 1024x1536
+        # Size hints for the model (see fal_cache.size_hint)
         t = asset["type"]
-        if t == "background":
-            payload["image_size"] = "1024x1536"  # portrait
-        else:
-            payload["image_size"] = "1024x1024"  # square
+        size_field, size = fal_cache.size_hint(model, t)
+        payload[size_field] = size
+
+        outputs = manifest.get("outputs", {})
+        target = None
+        if t == "icon":
+            target = outputs.get("icons", {}).get("size")
+        elif t == "background":
+            target = outputs.get("backgrounds", {}).get("size")
+        elif t == "mascot":
+            target = outputs.get("mascot", {}).get("size")
+        if not (target and isinstance(target, list) and len(target) == 2):
+            target = None
+
+        key = asset_key(model, asset)
+        if fal_cache.lookup(key):
+            print(f"Cached {asset['id']} -> {out_path}")
+            fal_cache.materialize(key, out_path, target, trim_pad=args.trim_pad)
+            cached += 1
+            continue
+
+        if fal_client is None:
+            _require_env("FAL_KEY")
+            try:
+                import fal_client  # type: ignore
+            except Exception as e:
+                print("fal_client not installed. Run: python3 -m pip install --user fal-client", file=sys.stderr)
+                raise
 
         print(f"Generating {asset['id']} -> {out_path} ...")
 
         result = fal_client.run(model, arguments=payload)
 
         # Result formats vary. Try common shapes.
-        img_b64 = None
+        img_bytes = None
         if isinstance(result, dict):
             if "image" in result and isinstance(result["image"], dict) and "base64" in result["image"]:
-                img_b64 = result["image"]["base64"]
+                img_bytes = base64.b64decode(result["image"]["base64"])
             elif "images" in result and result["images"]:
                 first = result["images"][0]
                 if isinstance(first, dict) and "base64" in first:
-                    img_b64 = first["base64"]
+                    img_bytes = base64.b64decode(first["base64"])
                 elif isinstance(first, dict) and "url" in first:
                     # If only URL is returned, you can fetch with requests.
                     import requests  # type: ignore
 
-                    r = requests.get(first["url"], timeout=60)
-                    r.raise_for_status()
-                    out_path.write_bytes(r.content)
-                    continue
+                    with requests.get(first["url"], timeout=60, stream=True) as r:
+                        r.raise_for_status()
+                        img_bytes = fal_cache.read_image(r)
 
-        if not img_b64:
+        if not img_bytes:
             raise RuntimeError(f"Unhandled response format for {asset['id']}: {result}")
 
-        out_path.write_bytes(base64.b64decode(img_b64))
-
-        # Optional: resize to the target size declared in the manifest outputs
-        try:
-            from PIL import Image  # type: ignore
-
-            outputs = manifest.get("outputs", {})
-            target = None
-            if t == "icon":
-                target = outputs.get("icons", {}).get("size")
-            elif t == "background":
-                target = outputs.get("backgrounds", {}).get("size")
-            elif t == "mascot":
-                target = outputs.get("mascot", {}).get("size")
-
-            if target and isinstance(target, list) and len(target) == 2:
-                tw, th = int(target[0]), int(target[1])
-                im = Image.open(out_path)
-                # Use contain for backgrounds (avoid cropping), direct resize for icons/mascot
-                if t == "background":
-                    im = im.resize((tw, th), Image.LANCZOS)
-                else:
-                    im = im.resize((tw, th), Image.LANCZOS)
-                im.save(out_path)
-        except Exception:
-            # Pillow not installed or resize failed; keep original
-            pass
+        # Cache the raw image, then write it resized (in memory) to the target declared in the manifest outputs
+        fal_cache.store(key, img_bytes)
+        fal_cache.materialize(key, out_path, target, data=img_bytes, trim_pad=args.trim_pad)
+        generated += 1
 
+    print(f"{generated + cached} assets: {generated} generated, {cached} from cache")
     print("Done.")
     return 0
 
@@ -4,16 +4,34 @@
 Usage:
   export FAL_KEY=...
   cd /mnt/d/Playground/Game_Taplok
-  python3 tools/generate_assets_falai_http.py [manifest_path] [asset_id1 asset_id2 ...]
+  python3 tools/generate_assets_falai_http.py [--concurrency 8] [manifest_path] [asset_id1 asset_id2 ...]
 
 Defaults:
   manifest_path = tools/fal_ai_asset_manifest.json
 
 This script:
 - reads a manifest JSON
-- POSTs to https://queue.fal.run/<model>
-- polls until completed
-- downloads the image(s) and writes to the manifest output paths
+- POSTs to https://queue.fal.run/<model>, up to --concurrency jobs in flight
+- polls all outstanding requests together until completed
+- downloads finished images into memory, resizes them there and writes each
+  output once (atomically) while the rest are still generating
+
+All HTTP goes through one keep-alive session (a connection pool per host).
+Each request's status is polled with jittered exponential backoff between
+--poll-interval and --poll-max, and server Retry-After hints take
+precedence. The final report counts HTTP calls per asset.
+
+Every submit, completion and failure is recorded in a journal
+(tools/.fal_journal.json, see --journal), keyed by output path. After an
+interrupted run, rerunning the same command resumes polling the requests
+that were still queued and skips assets that were already written, as long
+as their prompt and size are unchanged. --fresh ignores the journal.
+
+Raw generations go through the shared prompt-hash cache (fal_cache.py).
+Assets whose model, prompt, negative and size were already generated, by
+any manifest or by generate_assets_falai.py, are materialized from the
+cache without calling fal (see fal_cache.job_key). Identical keys within a
+run are submitted once.
 
 Notes:
 - gpt-image-1.5 schema guarantees `prompt` and `image_size`.
@@ -22,14 +40,39 @@ Notes:
 
 from __future__ import annotations
 
+import argparse
+import email.utils
+import functools
+import hashlib
 import json
+import math
 import os
 import pathlib
+import random
+import threading
 import time
-import sys
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
+
+import fal_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: journal writes are only serialized within one process
+    fcntl = None  # type: ignore[assignment]
+
+QUEUE_URL = os.environ.get("FAL_QUEUE_URL", "https://queue.fal.run")
+JOURNAL_PATH = pathlib.Path(__file__).with_name(".fal_journal.json")
+JOURNAL_VERSION = 1
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
 
 
 def require_env(name: str) -> str:
@@ -39,20 +82,89 @@ def require_env(name: str) -> str:
     return v
 
 
+@functools.lru_cache(maxsize=None)
 def auth_headers() -> dict[str, str]:
     key = require_env("FAL_KEY")
     return {"Authorization": f"Key {key}", "Content-Type": "application/json"}
 
 
-def submit(queue_base: str, prompt: str, *, image_size: str | None = None, aspect_ratio: str | None = None, output_format: str = "png") -> str:
+def http_session(pool_size: int = 16) -> requests.Session:
+    """Shared keep-alive session; the first call fixes the per-host pool size."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def retry_after(resp: requests.Response) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), if any."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(prev: float, lo: float, hi: float) -> float:
+    """Next poll delay: x1.5 per step with ±20% jitter, clamped to [lo, hi]."""
+    return max(lo, min(hi, prev * 1.5 * random.uniform(0.8, 1.2)))
+
+
+def http_request(method: str, url: str, *, kind: str, calls: Counter | None = None, auth: bool = True,
+                 retries: int = 4, idempotent: bool = True, **kwargs: Any) -> requests.Response:
+    """Send a request on the shared session, retrying throttling and transient errors.
+
+    Non-idempotent requests (submit) are only retried on 429, where the
+    server guarantees nothing was queued.
+    """
+    delay = 1.0
+    for attempt in range(retries + 1):
+        if calls is not None:
+            calls[kind] += 1
+        try:
+            r = http_session().request(method, url, headers=auth_headers() if auth else None, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if not idempotent or attempt == retries:
+                raise
+            hint = None
+        else:
+            retryable = r.status_code == 429 or (idempotent and r.status_code in RETRY_STATUSES)
+            if not retryable or attempt == retries:
+                r.raise_for_status()
+                return r
+            hint = retry_after(r)
+        if calls is not None:
+            calls["retry"] += 1
+        delay = backoff(delay, 1.0, 30.0)
+        time.sleep(hint if hint is not None else delay)
+    raise AssertionError("unreachable")
+
+
+def build_payload(prompt: str, *, image_size: str | None = None, aspect_ratio: str | None = None,
+                  output_format: str = "png") -> dict[str, Any]:
     payload: dict[str, Any] = {"prompt": prompt, "output_format": output_format}
     # Some models (e.g. gpt-image-1.5) use image_size; FLUX uses aspect_ratio.
     if image_size is not None:
         payload["image_size"] = image_size
     if aspect_ratio is not None:
         payload["aspect_ratio"] = aspect_ratio
-    r = requests.post(queue_base, headers=auth_headers(), json=payload, timeout=60)
-    r.raise_for_status()
+    return payload
+
+
+def submit(queue_base: str, prompt: str, *, image_size: str | None = None, aspect_ratio: str | None = None,
+           output_format: str = "png", calls: Counter | None = None) -> str:
+    payload = build_payload(prompt, image_size=image_size, aspect_ratio=aspect_ratio, output_format=output_format)
+    r = http_request("POST", queue_base, kind="submit", calls=calls, idempotent=False, json=payload, timeout=60)
     data = r.json()
     rid = data.get("request_id")
     if not rid:
@@ -60,31 +172,23 @@ def submit(queue_base: str, prompt: str, *, image_size: str | None = None, aspec
     return rid
 
 
-def wait_result(queue_base: str, request_id: str, timeout_s: int = 300) -> dict[str, Any]:
-    deadline = time.time() + timeout_s
-    status_url = f"{queue_base}/requests/{request_id}/status"
-    result_url = f"{queue_base}/requests/{request_id}"
-
-    while True:
-        if time.time() > deadline:
-            raise TimeoutError(f"Timed out waiting for {request_id}")
-
-        s = requests.get(status_url, headers=auth_headers(), timeout=30)
-        s.raise_for_status()
-        st = s.json()
+def poll_status(queue_base: str, request_id: str, calls: Counter | None = None) -> tuple[dict[str, Any], float | None]:
+    """Return (status JSON, server Retry-After hint in seconds or None).
 
-        if st.get("status") == "COMPLETED":
-            r = requests.get(result_url, headers=auth_headers(), timeout=60)
-            r.raise_for_status()
-            return r.json()
+    Single-shot: a throttled or failed poll raises, and run_jobs reschedules
+    it with the job's own backoff instead of sleeping in a worker.
+    """
+    s = http_request("GET", f"{queue_base}/requests/{request_id}/status", kind="status", calls=calls,
+                     retries=0, timeout=30)
+    return s.json(), retry_after(s)
 
-        if st.get("status") in {"FAILED", "CANCELED"}:
-            raise RuntimeError(f"Request {request_id} failed: {st}")
 
-        time.sleep(2)
+def fetch_result(queue_base: str, request_id: str, calls: Counter | None = None) -> dict[str, Any]:
+    r = http_request("GET", f"{queue_base}/requests/{request_id}", kind="result", calls=calls, timeout=60)
+    return r.json()
 
 
-def download_first_image(result: dict[str, Any], out_path: pathlib.Path) -> None:
+def fetch_first_image(result: dict[str, Any], calls: Counter | None = None) -> bytes:
     images = result.get("images") or []
     if not images:
         raise RuntimeError(f"No images in result: {result}")
@@ -94,81 +198,360 @@ def download_first_image(result: dict[str, Any], out_path: pathlib.Path) -> None
     if not url:
         raise RuntimeError(f"No url in first image: {first}")
 
-    resp = requests.get(url, timeout=120)
-    resp.raise_for_status()
-    out_path.write_bytes(resp.content)
+    resp = http_request("GET", url, kind="download", calls=calls, auth=False, timeout=120, stream=True)
+    with resp:
+        return fal_cache.read_image(resp)
+
+
+class Journal:
+    """JSON journal of fal requests, keyed by output path.
+
+    Each update re-reads the file under an exclusive lock, merges one entry
+    and atomically replaces the file, so concurrent runs (other manifests,
+    or several processes) never lose each other's entries or leave a
+    half-written journal behind.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != JOURNAL_VERSION:
+            return {}
+        return data.get("jobs", {})
+
+    def load(self) -> dict[str, Any]:
+        return self._read()
+
+    def update(self, key: str, **fields: Any) -> None:
+        with self._lock, open(self.path.with_name(self.path.name + ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self._read()
+            entries[key] = {**entries.get(key, {}), **fields, "updated": round(time.time(), 3)}
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": JOURNAL_VERSION, "jobs": entries}, indent=1, sort_keys=True),
+                           encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+@dataclass
+class Job:
+    asset_id: str
+    out_path: pathlib.Path
+    prompt: str
+    image_size: str | None
+    aspect_ratio: str | None
+    target: list[int] | None
+    cache_key: str = ""
+    trim_pad: int | None = None
+    fingerprint: str = ""
+    request_id: str | None = None
+    started: float = 0.0
+    submitted: float = 0.0
+    finished: float = 0.0
+    error: str | None = None
+    poll_delay: float = 0.0
+    next_poll: float = 0.0
+    calls: Counter = field(default_factory=Counter)
+
+
+def plan_jobs(manifest: dict[str, Any], only_ids: set[str] | None, trim_pad: int | None = None) -> list[Job]:
+    outputs = manifest.get("outputs", {})
+    model = manifest.get("style", {}).get("model", "fal-ai/gpt-image-1.5")
 
+    jobs = []
+    for asset in manifest["assets"]:
+        if only_ids is not None and asset.get("id") not in only_ids:
+            continue
 
-def resize_if_needed(out_path: pathlib.Path, target_size: list[int] | None) -> None:
-    if not target_size:
-        return
-    try:
-        from PIL import Image
+        t = asset["type"]
+        # Generate at the model's size hint, then resize to manifest targets.
+        if t == "background":
+            target = outputs.get("background", {}).get("size") or outputs.get("backgrounds", {}).get("size")
+        else:
+            target = outputs.get(t + "s", {}).get("size") or outputs.get("icons", {}).get("size")
+        size_field, size = fal_cache.size_hint(model, t)
+
+        prompt = asset["prompt"]
+        neg = asset.get("negative")
+        key = fal_cache.job_key(model, prompt, neg, size)
+        if neg:
+            prompt = f"{prompt}\n\nAvoid: {neg}"
+
+        job = Job(asset["id"], pathlib.Path(asset["out"]), prompt, size if size_field == "image_size" else None,
+                  size if size_field == "aspect_ratio" else None, target)
+        job.cache_key = key
+        job.trim_pad = trim_pad
+        job.fingerprint = hashlib.sha256(json.dumps([job.cache_key, job.target, trim_pad]).encode("utf-8")).hexdigest()
+        jobs.append(job)
+    return jobs
+
+
+def resume_jobs(jobs: list[Job], journal: Journal) -> list[Job]:
+    """Drop jobs already written and attach queued request IDs; returns the jobs still to run."""
+    entries = journal.load()
+    remaining = []
+    for job in jobs:
+        entry = entries.get(job.out_path.as_posix(), {})
+        if entry.get("fingerprint") != job.fingerprint:
+            remaining.append(job)
+        elif entry.get("status") == "done" and job.out_path.exists():
+            print(f"Skipping {job.asset_id} (done in journal)")
+        else:
+            if entry.get("status") == "submitted" and entry.get("request_id"):
+                job.request_id = entry["request_id"]
+                print(f"Resuming {job.asset_id} (request {job.request_id})")
+            remaining.append(job)
+    return remaining
+
+
+def _submit_job(queue_base: str, job: Job, journal: Journal | None) -> str:
+    job.started = time.perf_counter()
+    rid = submit(queue_base, job.prompt, image_size=job.image_size, aspect_ratio=job.aspect_ratio,
+                 output_format="png", calls=job.calls)
+    # Record immediately, from the worker, so an interrupt right after submit cannot lose the ID.
+    if journal is not None:
+        journal.update(job.out_path.as_posix(), asset_id=job.asset_id, fingerprint=job.fingerprint,
+                       request_id=rid, status="submitted", error=None)
+    return rid
 
-        tw, th = int(target_size[0]), int(target_size[1])
-        im = Image.open(out_path)
-        im = im.resize((tw, th), Image.LANCZOS)
-        im.save(out_path)
-    except Exception:
-        return
+
+def materialize_job(job: Job, journal: Journal | None) -> None:
+    fal_cache.materialize(job.cache_key, job.out_path, job.target, trim_pad=job.trim_pad)
+    if journal is not None:
+        journal.update(job.out_path.as_posix(), asset_id=job.asset_id, fingerprint=job.fingerprint,
+                       request_id=job.request_id, status="done", error=None)
+
+
+def _finish_job(queue_base: str, job: Job, journal: Journal | None) -> None:
+    result = fetch_result(queue_base, job.request_id, job.calls)
+    data = fetch_first_image(result, job.calls)
+    fal_cache.store(job.cache_key, data)
+    fal_cache.materialize(job.cache_key, job.out_path, job.target, data=data, trim_pad=job.trim_pad)
+    if journal is not None:
+        journal.update(job.out_path.as_posix(), status="done")
+
+
+def run_jobs(jobs: list[Job], submit_base: str, status_base: str, *, concurrency: int = 8,
+             poll_interval: float = 0.5, poll_max: float = 4.0, timeout_s: float = 900.0,
+             journal: Journal | None = None) -> dict[str, Any]:
+    """Run jobs with at most `concurrency` requests queued at fal at once.
+
+    One loop drives everything: it tops up submissions, starts a status
+    poll for every outstanding request whose backoff has expired, and waits
+    on submits, polls and finishes together, so one slow or throttled call
+    never holds up the others. Completed requests go to a separate pool for
+    download + resize so those overlap with generations still in the queue. Jobs that
+    already carry a request_id (resumed from the journal) skip the submit.
+    """
+    http_session(pool_size=2 * concurrency)
+    todo = deque(job for job in jobs if job.request_id is None)
+    submitting: dict[Future, Job] = {}
+    pending: dict[str, Job] = {}
+    polling: dict[Future, Job] = {}
+    finishing: dict[Future, Job] = {}
+    peak = 0
+    t0 = time.perf_counter()
+
+    for job in jobs:
+        if job.request_id is not None:
+            job.started = job.submitted = job.next_poll = t0
+            job.poll_delay = poll_interval
+            pending[job.request_id] = job
+
+    def fail(job: Job, err: BaseException | str) -> None:
+        job.error = str(err)
+        job.finished = time.perf_counter()
+        print(f"FAILED {job.asset_id}: {job.error}")
+        if journal is not None:
+            journal.update(job.out_path.as_posix(), status="failed", error=job.error)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as net, ThreadPoolExecutor(max_workers=concurrency) as io:
+        while todo or submitting or pending or finishing:
+            while todo and len(submitting) + len(pending) < concurrency:
+                job = todo.popleft()
+                print(f"Submitting {job.asset_id} -> {job.out_path} ({job.aspect_ratio or job.image_size})")
+                submitting[net.submit(_submit_job, submit_base, job, journal)] = job
+            peak = max(peak, len(submitting) + len(pending))
+
+            now = time.perf_counter()
+            for job in pending.values():
+                if job.next_poll <= now:
+                    job.next_poll = math.inf  # one status call in flight per job
+                    polling[net.submit(poll_status, status_base, job.request_id, job.calls)] = job
+
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(job.next_poll for job in pending.values()) - time.perf_counter())
+                if math.isinf(timeout):
+                    timeout = None
+            waiting = list(submitting) + list(polling) + list(finishing)
+            if not waiting:
+                if timeout:
+                    time.sleep(timeout)
+                continue
+            done, _ = wait(waiting, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in submitting:
+                    job = submitting.pop(fut)
+                    try:
+                        job.request_id = fut.result()
+                    except Exception as e:
+                        fail(job, e)
+                        continue
+                    job.submitted = time.perf_counter()
+                    job.poll_delay = poll_interval
+                    job.next_poll = job.submitted + poll_interval
+                    pending[job.request_id] = job
+                elif fut in polling:
+                    job = polling.pop(fut)
+                    try:
+                        st, hint = fut.result()
+                    except requests.HTTPError as e:
+                        # 4xx: the request is unknown or expired (e.g. a stale journal entry); don't poll it to the timeout.
+                        code = e.response.status_code
+                        st = {"status": "FAILED" if code < 500 and code != 429 else "POLL_ERROR", "error": str(e)}
+                        hint = retry_after(e.response)
+                    except Exception as e:
+                        st, hint = {"status": "POLL_ERROR", "error": str(e)}, None
+                    status = st.get("status")
+                    if status == "COMPLETED":
+                        del pending[job.request_id]
+                        finishing[io.submit(_finish_job, status_base, job, journal)] = job
+                    elif status in {"FAILED", "CANCELED"}:
+                        del pending[job.request_id]
+                        fail(job, f"request {job.request_id} failed: {st}")
+                    elif time.perf_counter() - job.submitted > timeout_s:
+                        del pending[job.request_id]
+                        fail(job, f"timed out waiting for {job.request_id}")
+                    else:
+                        if status == "POLL_ERROR":
+                            job.calls["retry"] += 1
+                        job.poll_delay = backoff(job.poll_delay, poll_interval, poll_max)
+                        job.next_poll = time.perf_counter() + (hint if hint is not None else job.poll_delay)
+                else:
+                    job = finishing.pop(fut)
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        fail(job, e)
+                        continue
+                    job.finished = time.perf_counter()
+                    print(f"Wrote {job.asset_id} -> {job.out_path} ({job.finished - job.started:.1f}s, "
+                          f"{sum(job.calls.values()) - job.calls['retry']} HTTP calls)")
+
+    wall = time.perf_counter() - t0
+    latencies = [j.finished - j.started for j in jobs if j.finished]
+    calls: Counter = sum((j.calls for j in jobs), Counter())
+    return {
+        "jobs": len(jobs),
+        "failed": sum(1 for j in jobs if j.error),
+        "wall_s": wall,
+        "sum_latency_s": sum(latencies),
+        "max_latency_s": max(latencies, default=0.0),
+        "peak_in_flight": peak,
+        "calls": dict(calls),
+    }
 
 
 def main() -> int:
-    manifest_path = pathlib.Path(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].endswith('.json') else pathlib.Path(__file__).with_name("fal_ai_asset_manifest.json")
-    argv_ids = sys.argv[2:] if manifest_path != pathlib.Path(__file__).with_name("fal_ai_asset_manifest.json") else sys.argv[1:]
+    default_manifest = pathlib.Path(__file__).with_name("fal_ai_asset_manifest.json")
+    ap = argparse.ArgumentParser(description="Generate image assets through the fal.ai HTTP queue API")
+    ap.add_argument("args", nargs="*", metavar="manifest_or_id",
+                    help="Optional manifest path (*.json) followed by asset ids to generate")
+    ap.add_argument("--concurrency", type=int, default=8, help="Max requests queued at fal at once")
+    ap.add_argument("--poll-interval", type=float, default=0.5, help="First status poll delay in seconds")
+    ap.add_argument("--poll-max", type=float, default=4.0, help="Cap for the jittered poll backoff in seconds")
+    ap.add_argument("--timeout", type=float, default=900.0, help="Per-request timeout in seconds")
+    ap.add_argument("--queue-url", default=QUEUE_URL,
+                    help="Queue API root (env FAL_QUEUE_URL; e.g. a local fake_fal_server.py)")
+    ap.add_argument("--trim-pad", type=int, default=None,
+                    help="Crop transparent margins to this padding and write *.trim.json (see trim_sprites.py)")
+    ap.add_argument("--journal", default=str(JOURNAL_PATH), help="Request journal used to resume interrupted runs")
+    ap.add_argument("--fresh", action="store_true", help="Ignore the journal and cache; resubmit every selected asset")
+    args = ap.parse_args()
+    if args.concurrency <= 0:
+        ap.error("--concurrency must be positive")
+    if not 0 < args.poll_interval <= args.poll_max:
+        ap.error("need 0 < --poll-interval <= --poll-max")
+
+    manifest_path = pathlib.Path(args.args[0]) if args.args and args.args[0].endswith(".json") else default_manifest
+    argv_ids = args.args[1:] if manifest_path != default_manifest else args.args
 
     manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
-    outputs = manifest.get("outputs", {})
 
     model = manifest.get("style", {}).get("model", "fal-ai/gpt-image-1.5")
-    queue_submit_base = f"https://queue.fal.run/{model}"
+    queue_url = args.queue_url.rstrip("/")
+    queue_submit_base = f"{queue_url}/{model}"
 
     # Some fal queue endpoints use a different base for status/result (notably flux-pro)
     if model.startswith("fal-ai/flux-pro/"):
-        queue_status_base = "https://queue.fal.run/fal-ai/flux-pro"
+        queue_status_base = f"{queue_url}/fal-ai/flux-pro"
     else:
         queue_status_base = queue_submit_base
 
     only_ids = set(argv_ids) if len(argv_ids) > 0 else None
-
-    for asset in manifest["assets"]:
-        if only_ids is not None and asset.get("id") not in only_ids:
-            continue
-
-        out_path = pathlib.Path(asset["out"])
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-
-        t = asset["type"]
-        # Size hints
-        # gpt-image-1.5 validates specific sizes; FLUX accepts width/height via `image_size` in many cases.
-        # We'll keep using these common sizes and then resize to manifest targets.
-        if t == "background":
-            image_size = "1024x1536"
-            target = outputs.get("background", {}).get("size") or outputs.get("backgrounds", {}).get("size")
+    jobs = plan_jobs(manifest, only_ids, args.trim_pad)
+    planned = len(jobs)
+    journal = Journal(pathlib.Path(args.journal))
+    if not args.fresh:
+        jobs = resume_jobs(jobs, journal)
+    done = planned - len(jobs)
+
+    # Serve what the cache already has; submit each remaining payload once.
+    primary: dict[str, Job] = {}
+    duplicates: list[Job] = []
+    cached = 0
+    failed = 0
+    # Resumed jobs first, so an in-flight request is reused rather than a duplicate submitted.
+    for job in sorted(jobs, key=lambda j: j.request_id is None):
+        if job.request_id is None and fal_cache.lookup(job.cache_key) and not args.fresh:
+            materialize_job(job, journal)
+            cached += 1
+            print(f"Cached {job.asset_id} -> {job.out_path}")
+        elif job.cache_key in primary:
+            duplicates.append(job)
         else:
-            image_size = "1024x1024"
-            target = outputs.get(t + "s", {}).get("size") or outputs.get("icons", {}).get("size")
+            primary[job.cache_key] = job
+    jobs = list(primary.values())
 
-        prompt = asset["prompt"]
-        neg = asset.get("negative")
-        if neg:
-            prompt = f"{prompt}\n\nAvoid: {neg}"
-
-        is_flux = "flux" in model
-        if is_flux:
-            # FLUX models use aspect_ratio instead of image_size
-            aspect_ratio = "16:9" if t == "background" else "1:1"
-            print(f"Generating {asset['id']} -> {out_path} (aspect {aspect_ratio})")
-            rid = submit(queue_submit_base, prompt, aspect_ratio=aspect_ratio, output_format="png")
+    try:
+        stats = run_jobs(jobs, queue_submit_base, queue_status_base, concurrency=args.concurrency,
+                         poll_interval=args.poll_interval, poll_max=args.poll_max, timeout_s=args.timeout,
+                         journal=journal)
+    except KeyboardInterrupt:
+        print(f"Interrupted; queued requests are kept in {journal.path}. Rerun the same command to resume.")
+        return 130
+
+    for job in duplicates:
+        if fal_cache.lookup(job.cache_key):
+            materialize_job(job, journal)
+            cached += 1
+            print(f"Cached {job.asset_id} -> {job.out_path} (same prompt as {primary[job.cache_key].asset_id})")
         else:
-            print(f"Generating {asset['id']} -> {out_path} ({image_size})")
-            rid = submit(queue_submit_base, prompt, image_size=image_size, output_format="png")
-        result = wait_result(queue_status_base, rid, timeout_s=900)
-        download_first_image(result, out_path)
-        resize_if_needed(out_path, target)
-
-    print("Done.")
-    return 0
+            failed += 1
+            print(f"FAILED {job.asset_id}: shares a prompt with failed {primary[job.cache_key].asset_id}")
+
+    failed += stats["failed"]
+    print(f"{planned} assets: {len(jobs) - stats['failed']} generated, {cached} from cache, "
+          f"{done} already done, {failed} failed")
+    if not jobs:
+        return 1 if failed else 0
+    print(f"Done: {stats['jobs'] - stats['failed']}/{stats['jobs']} generations in {stats['wall_s']:.1f}s wall "
+          f"(sum of job latencies {stats['sum_latency_s']:.1f}s, slowest {stats['max_latency_s']:.1f}s, "
+          f"peak {stats['peak_in_flight']} in flight)")
+    calls = stats["calls"]
+    n = max(1, stats["jobs"])
+    total = sum(calls.values()) - calls.get("retry", 0)
+    print(f"HTTP calls: {total} ({total / n:.1f} per asset; "
+          + ", ".join(f"{k} {calls.get(k, 0)}" for k in ("submit", "status", "result", "download", "retry")) + ")")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -2,43 +2,48 @@
 """Generate simple metronome click WAV tracks for RhythmGame.
 
 Creates WAV 16-bit mono 44100Hz with clicks on beats.
+
+The click is synthesized once and mixed into a NumPy buffer by slicing, so
+multi-minute tracks render in milliseconds.
+
+Prereqs:
+  python3 -m pip install --user numpy
 """
 
 from __future__ import annotations
 
 import argparse
-import math
 import pathlib
 import struct
 
+import numpy as np
+
 SR = 44100
 
 
+def click_kernel(click_len: int, freq: float = 1500.0, amp: float = 0.6) -> np.ndarray:
+    """One click: a linearly decaying sine burst, identical for every beat."""
+    k = np.arange(click_len)
+    w = 1.0 - (k / click_len)
+    return amp * w * np.sin(2 * np.pi * freq * (k / SR))
+
+
 def synth_click_track(duration_s: float, beats: int, beat_interval: float, start_offset: float = 0.5):
     n = int(duration_s * SR)
-    buf = [0.0] * n
+    buf = np.zeros(n)
 
-    # click: short 1.5kHz burst
-    click_len = int(0.035 * SR)
-    freq = 1500.0
-    amp = 0.6
+    # click: short 1.5kHz burst, synthesized once
+    kernel = click_kernel(int(0.035 * SR))
 
     for i in range(beats):
-        t0 = start_offset + i * beat_interval
-        p0 = int(t0 * SR)
-        for k in range(click_len):
-            p = p0 + k
-            if 0 <= p < n:
-                # windowed sine burst
-                w = 1.0 - (k / click_len)
-                buf[p] += amp * w * math.sin(2 * math.pi * freq * (k / SR))
-
-    # clamp and convert
-    out = bytearray()
-    for s in buf:
-        s = max(-1.0, min(1.0, s))
-        out += struct.pack('<h', int(s * 32767))
-    return bytes(out)
+        p0 = int((start_offset + i * beat_interval) * SR)
+        # clip the kernel against both ends of the buffer
+        a, b = max(p0, 0), min(p0 + len(kernel), n)
+        if a < b:
+            buf[a:b] += kernel[a - p0:b - p0]
+
+    # clamp and convert in one pass
+    return (np.clip(buf, -1.0, 1.0) * 32767).astype('<i2').tobytes()
 
 
 def write_wav(path: pathlib.Path, pcm16: bytes):
@@ -64,7 +69,9 @@ def write_wav(path: pathlib.Path, pcm16: bytes):
     header += b'data'
     header += struct.pack('<I', data_size)
 
-    path.write_bytes(bytes(header) + pcm16)
+    with path.open('wb') as f:
+        f.write(header)
+        f.write(pcm16)
 
 
 def main() -> int:
@@ -1,31 +1,94 @@
 #!/usr/bin/env python3
 """Generate simple flat pastel assets for remaining mini-games.
 Creates backgrounds (1080x1920) and simple sprites (keys/circles/tiles/icons).
+
+  python3 tools/generate_pastel_assets_stage2.py [spec.json] [--jobs N] [--force] [--aa 4] [--trim-pad 2]
+
+What to draw lives in pastel_asset_spec.json: one entry per output with a
+"kind" (background, key, circle, tile, icon), an "out" path relative to
+assets/textures/games and that kind's colours. Every entry is one job on a
+process pool; fonts are loaded once per worker. Each entry is hashed together
+with the options that affect it, and the hashes are kept in
+tools/.pastel_state.json, so a rerun only renders new, changed or missing
+outputs (--force renders everything).
+
+Backgrounds are composed in a NumPy RGBA buffer: the gradient is one
+broadcast row ramp and each blob is alpha-blended (source-over) inside its
+bounding box only. --aa N supersamples blob edges N x N; only the one-pixel rim is
+resampled, so it costs about the same as the aliased default.
+
+--trim-pad crops the sprites' transparent margins afterwards (see
+trim_sprites.py); backgrounds are opaque and stay untouched.
 """
 
 from __future__ import annotations
 
+import argparse
+import functools
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any
+
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from trim_sprites import sidecar_path, trim_tree
+
 ROOT = Path(__file__).resolve().parents[1]
 ASSETS = ROOT / "assets" / "textures" / "games"
+SPEC_PATH = Path(__file__).resolve().parent / "pastel_asset_spec.json"
+STATE_PATH = Path(__file__).resolve().parent / ".pastel_state.json"
+# Bump when the drawing code changes so every output is re-rendered.
+RENDER_VERSION = 2
 
 
 def _ensure(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def _linear_gradient(size, top, bottom):
+def _gradient_array(size, top, bottom) -> np.ndarray:
+    """(h, w, 4) uint8 vertical ramp from top to bottom, built from one column of rows."""
     w, h = size
-    img = Image.new("RGBA", size, top)
-    dr = ImageDraw.Draw(img)
-    for y in range(h):
-        t = y / max(1, h - 1)
-        c = tuple(int(top[i] * (1 - t) + bottom[i] * t) for i in range(4))
-        dr.line([(0, y), (w, y)], fill=c)
-    return img
+    t = np.linspace(0.0, 1.0, h)[:, None]
+    rows = np.rint(np.asarray(top, np.float64) * (1 - t) + np.asarray(bottom, np.float64) * t).astype(np.uint8)
+    return np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (h, w, 4)))
+
+
+def _disc_coverage(cx, cy, r, x0, y0, x1, y1, aa: int = 1) -> np.ndarray:
+    """Coverage in [0, 1] of the disc over pixel centres in [x0, x1) x [y0, y1).
+
+    aa > 1 averages an aa x aa grid of subsamples, but only for pixels whose
+    centre lies within a pixel of the rim; the rest are fully in or out.
+    """
+    ys = np.arange(y0, y1, dtype=np.float32)[:, None] - cy
+    xs = np.arange(x0, x1, dtype=np.float32)[None, :] - cx
+    d2 = xs * xs + ys * ys
+    cov = (d2 <= r * r).astype(np.float32)
+    if aa > 1:
+        ey, ex = np.nonzero((d2 > (r - 1) ** 2) & (d2 < (r + 1) ** 2))
+        offs = (np.arange(aa, dtype=np.float32) + 0.5) / aa - 0.5
+        sy = ys[ey, 0][:, None, None] + offs[None, :, None]
+        sx = xs[0, ex][:, None, None] + offs[None, None, :]
+        cov[ey, ex] = ((sx * sx + sy * sy) <= r * r).mean(axis=(1, 2))
+    return cov
+
+
+def _blend_disc(buf: np.ndarray, cx, cy, r, col, aa: int = 1) -> None:
+    """Source-over a straight-alpha RGBA disc onto a uint8 RGBA buffer, in place."""
+    h, w = buf.shape[:2]
+    x0, y0 = max(0, int(cx - r) - 1), max(0, int(cy - r) - 1)
+    x1, y1 = min(w, int(cx + r) + 2), min(h, int(cy + r) + 2)
+    if x0 >= x1 or y0 >= y1:
+        return
+    a = _disc_coverage(cx, cy, r, x0, y0, x1, y1, aa)[..., None]
+    a *= col[3] / 255.0
+    dst = buf[y0:y1, x0:x1].astype(np.float32)
+    dst += (np.asarray([*col[:3], 255], np.float32) - dst) * a
+    buf[y0:y1, x0:x1] = np.rint(dst)
 
 
 def _rounded_rect(draw: ImageDraw.ImageDraw, box, radius, fill, outline=None, width=1):
@@ -35,9 +98,12 @@ def _rounded_rect(draw: ImageDraw.ImageDraw, box, radius, fill, outline=None, wi
 
 def _save(img: Image.Image, path: Path) -> None:
     _ensure(path.parent)
-    img.save(path, format="PNG")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    img.save(tmp, format="PNG")
+    os.replace(tmp, path)
 
 
+@functools.lru_cache(maxsize=None)
 def _try_font(size: int):
     # Use DejaVu if present, else default.
     for name in [
@@ -49,137 +115,151 @@ def _try_font(size: int):
     return ImageFont.load_default()
 
 
-def make_background(out_dir: Path, name: str, top, bottom, blobs):
-    img = _linear_gradient((1080, 1920), top, bottom)
-    d = ImageDraw.Draw(img)
+def render_background(top, bottom, blobs, aa: int = 1) -> Image.Image:
+    buf = _gradient_array((1080, 1920), top, bottom)
     for (cx, cy, r, col) in blobs:
-        d.ellipse([cx - r, cy - r, cx + r, cy + r], fill=col)
-    _save(img, out_dir / name)
+        _blend_disc(buf, cx, cy, r, col, aa)
+    return Image.fromarray(buf, "RGBA")
 
 
-def make_key_sprite(out_dir: Path, name: str, fill, accent):
+def render_key(fill, accent) -> Image.Image:
     img = Image.new("RGBA", (256, 512), (0, 0, 0, 0))
     d = ImageDraw.Draw(img)
     # shadow
     _rounded_rect(d, (18, 18, 238, 498), 36, fill=(0, 0, 0, 35))
     # body
-    _rounded_rect(d, (12, 12, 236, 492), 36, fill=fill, outline=(255, 255, 255, 180), width=3)
+    _rounded_rect(d, (12, 12, 236, 492), 36, fill=tuple(fill), outline=(255, 255, 255, 180), width=3)
     # top accent band
-    _rounded_rect(d, (24, 24, 224, 96), 24, fill=accent)
-    _save(img, out_dir / name)
+    _rounded_rect(d, (24, 24, 224, 96), 24, fill=tuple(accent))
+    return img
 
 
-def make_circle_sprite(out_dir: Path, name: str, fill):
+def render_circle(fill) -> Image.Image:
     img = Image.new("RGBA", (256, 256), (0, 0, 0, 0))
     d = ImageDraw.Draw(img)
     d.ellipse((12, 14, 244, 246), fill=(0, 0, 0, 35))
-    d.ellipse((8, 8, 248, 248), fill=fill, outline=(255, 255, 255, 180), width=4)
-    _save(img, out_dir / name)
+    d.ellipse((8, 8, 248, 248), fill=tuple(fill), outline=(255, 255, 255, 180), width=4)
+    return img
 
 
-def make_tile_sprite(out_dir: Path, name: str, base):
+def render_tile(base) -> Image.Image:
     img = Image.new("RGBA", (256, 256), (0, 0, 0, 0))
     d = ImageDraw.Draw(img)
     _rounded_rect(d, (18, 22, 244, 248), 40, fill=(0, 0, 0, 35))
-    _rounded_rect(d, (12, 12, 244, 244), 40, fill=base, outline=(255, 255, 255, 160), width=4)
-    _save(img, out_dir / name)
+    _rounded_rect(d, (12, 12, 244, 244), 40, fill=tuple(base), outline=(255, 255, 255, 160), width=4)
+    return img
 
 
-def make_icon(out_dir: Path, name: str, letter: str, fill, text_col=(40, 40, 60, 255)):
+def render_icon(letter: str, fill, text_col=(40, 40, 60, 255)) -> Image.Image:
     img = Image.new("RGBA", (256, 256), (0, 0, 0, 0))
     d = ImageDraw.Draw(img)
     d.ellipse((16, 18, 240, 242), fill=(0, 0, 0, 30))
-    d.ellipse((12, 12, 244, 244), fill=fill, outline=(255, 255, 255, 180), width=4)
+    d.ellipse((12, 12, 244, 244), fill=tuple(fill), outline=(255, 255, 255, 180), width=4)
 
     font = _try_font(120)
     w, h = d.textbbox((0, 0), letter, font=font)[2:]
-    d.text(((256 - w) / 2, (256 - h) / 2 - 8), letter, font=font, fill=text_col)
-    _save(img, out_dir / name)
+    d.text(((256 - w) / 2, (256 - h) / 2 - 8), letter, font=font, fill=tuple(text_col))
+    return img
 
 
-def main():
-    # Pastel palettes
-    pastel_blue_top = (223, 242, 255, 255)
-    pastel_blue_bottom = (255, 245, 253, 255)
-
-    # Piano
-    piano_dir = ASSETS / "piano"
-    make_background(
-        piano_dir,
-        "bg_piano_1080x1920.png",
-        top=pastel_blue_top,
-        bottom=pastel_blue_bottom,
-        blobs=[
-            (220, 340, 240, (255, 220, 235, 120)),
-            (880, 520, 280, (210, 245, 230, 120)),
-            (540, 1480, 360, (245, 235, 255, 130)),
-        ],
-    )
-    make_key_sprite(piano_dir, "key_piano_256x512.png", fill=(252, 252, 255, 255), accent=(240, 248, 255, 255))
-    icons = [
-        ("komodo", "K", (232, 232, 255, 255)),
-        ("orangutan", "O", (255, 235, 220, 255)),
-        ("burung", "B", (225, 250, 255, 255)),
-        ("paus", "P", (225, 240, 255, 255)),
-        ("belalang", "L", (230, 255, 235, 255)),
-    ]
-    for iid, letter, col in icons:
-        make_icon(piano_dir, f"icon_{iid}_256.png", letter, fill=col)
-
-    # Creative backgrounds (Coloring/FingerPaint)
-    creative_dir = ASSETS / "creative"
-    make_background(
-        creative_dir,
-        "bg_creative_1080x1920.png",
-        top=(255, 245, 230, 255),
-        bottom=(235, 250, 255, 255),
-        blobs=[
-            (280, 420, 260, (255, 220, 200, 120)),
-            (860, 360, 240, (220, 245, 255, 120)),
-            (540, 1500, 380, (230, 255, 235, 120)),
-        ],
-    )
-
-    # Rhythm
-    rhythm_dir = ASSETS / "rhythm"
-    make_background(
-        rhythm_dir,
-        "bg_rhythm_1080x1920.png",
-        top=(240, 230, 255, 255),
-        bottom=(230, 255, 248, 255),
-        blobs=[
-            (260, 520, 260, (255, 235, 250, 120)),
-            (860, 540, 260, (220, 235, 255, 120)),
-            (540, 1480, 420, (255, 250, 220, 120)),
-        ],
-    )
-    for i, col in enumerate([(232, 74, 61, 255), (56, 189, 248, 255), (251, 191, 36, 255), (52, 211, 153, 255)]):
-        make_circle_sprite(rhythm_dir, f"circle_{i+1}_256.png", fill=col)
-
-    # Shape Match
-    shape_dir = ASSETS / "shape_match"
-    make_background(
-        shape_dir,
-        "bg_shape_match_1080x1920.png",
-        top=(245, 250, 255, 255),
-        bottom=(255, 245, 235, 255),
-        blobs=[
-            (220, 420, 280, (230, 255, 245, 120)),
-            (900, 420, 280, (255, 235, 220, 120)),
-            (540, 1500, 440, (245, 235, 255, 120)),
-        ],
-    )
-    make_tile_sprite(shape_dir, "tile_option_256.png", base=(250, 250, 255, 255))
-    make_tile_sprite(shape_dir, "tile_silhouette_512.png", base=(235, 240, 250, 255))
-
-    # simple puzzle icons (letters)
-    for iid, letter in [
-        ("joglo", "J"), ("gadang", "G"), ("tongkonan", "T"), ("kampoeng", "K"),
-        ("komodo", "K"), ("orangutan", "O"), ("burung", "B"), ("paus", "P"),
-    ]:
-        make_icon(shape_dir, f"icon_{iid}_256.png", letter, fill=(255, 255, 255, 255))
+RENDERERS = {
+    "background": render_background,
+    "key": render_key,
+    "circle": render_circle,
+    "tile": render_tile,
+    "icon": render_icon,
+}
 
-    print("Generated pastel assets into", ASSETS)
+
+def entry_options(entry: dict[str, Any], aa: int, trim_pad: int | None) -> dict[str, Any]:
+    """The CLI options that change this entry's output."""
+    if entry["kind"] == "background":
+        return {"aa": aa}
+    return {"trim_pad": trim_pad}
+
+
+def entry_hash(entry: dict[str, Any], options: dict[str, Any]) -> str:
+    blob = json.dumps({"v": RENDER_VERSION, "entry": entry, "options": options}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def load_spec(path: Path) -> list[dict[str, Any]]:
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    entries = spec["assets"]
+    seen: set[str] = set()
+    for e in entries:
+        if e.get("kind") not in RENDERERS:
+            raise SystemExit(f"{path}: unknown kind {e.get('kind')!r} for {e.get('out')!r}")
+        if e["out"] in seen:
+            raise SystemExit(f"{path}: duplicate output {e['out']!r}")
+        seen.add(e["out"])
+    return entries
+
+
+def load_state(path: Path) -> dict[str, str]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(path: Path, state: dict[str, str]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _render_job(job: tuple[dict[str, Any], dict[str, Any], str]) -> str:
+    entry, options, assets = job
+    params = {k: v for k, v in entry.items() if k not in {"kind", "out"}}
+    if entry["kind"] == "background":
+        params["aa"] = options["aa"]
+    out = Path(assets) / entry["out"]
+    _save(RENDERERS[entry["kind"]](**params), out)
+    # A fresh render is untrimmed; main() re-trims it when --trim-pad is set.
+    sidecar_path(out).unlink(missing_ok=True)
+    return entry["out"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate flat pastel mini-game assets")
+    ap.add_argument("spec", nargs="?", default=str(SPEC_PATH), help="Asset spec JSON")
+    ap.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="Render every entry even if unchanged")
+    ap.add_argument("--aa", type=int, default=1,
+                    help="Supersample background blob edges N x N (1 = aliased)")
+    ap.add_argument("--trim-pad", type=int, default=None,
+                    help="Crop transparent sprite margins to this padding and write *.trim.json")
+    args = ap.parse_args()
+    if args.aa < 1:
+        ap.error("--aa must be >= 1")
+
+    t0 = time.perf_counter()
+    entries = load_spec(Path(args.spec))
+    state = {} if args.force else load_state(STATE_PATH)
+    work = []
+    hashes: dict[str, str] = {}
+    for entry in entries:
+        options = entry_options(entry, args.aa, args.trim_pad)
+        hashes[entry["out"]] = entry_hash(entry, options)
+        if state.get(entry["out"]) != hashes[entry["out"]] or not (ASSETS / entry["out"]).exists():
+            work.append((entry, options, str(ASSETS)))
+
+    rendered: list[str] = []
+    if work:
+        with ProcessPoolExecutor(max_workers=min(len(work), args.jobs or os.cpu_count() or 1)) as pool:
+            for out in pool.map(_render_job, work):
+                rendered.append(out)
+                state[out] = hashes[out]
+
+    sprites = [ASSETS / e["out"] for e, _, _ in work if e["kind"] != "background"]
+    if args.trim_pad is not None and sprites:
+        n, before, after = trim_tree(sprites, pad=args.trim_pad, jobs=args.jobs, verbose=False)
+        print(f"Trimmed {n} sprites: {before} -> {after} px")
+
+    write_state(STATE_PATH, {k: v for k, v in state.items() if k in hashes})
+    print(f"Rendered {len(rendered)}, skipped {len(entries) - len(rendered)} of {len(entries)} assets "
+          f"into {ASSETS} in {time.perf_counter() - t0:.2f}s")
 
 
 if __name__ == "__main__":
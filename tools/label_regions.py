@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Precompute fill regions for Coloring Book templates.
+
+ColoringGame used to flood-fill from the tapped pixel on every tap. This
+tool segments each template once, ahead of time, into 4-connected regions
+of non-outline pixels. It uses the same rule as the game's fill: a pixel is
+an outline if it matches black within _colors_match's 0.02 tolerance.
+
+Segmentation is vectorized. Each row is run-length encoded. Runs that
+overlap between adjacent rows are paired with searchsorted and then joined
+by a union-find that does hooking and pointer-jumping on whole arrays.
+
+For <id>.png it writes two files next to the template:
+
+  <id>.regions.png   label index per pixel: 0 = outline, 1..N = region.
+                     8-bit grayscale when N < 256, else RGB with the id
+                     little-endian in R, G, B.
+  <id>.regions.json  {"version", "size", "encoding", "regions": [
+                       {"id", "bbox": [x0, y0, x1, y1], "pixels",
+                        "spans": [y, x0, x1, ...]}]}   (x1/y1 exclusive)
+
+With these, a fill is one lookup of the tapped pixel's id followed by one
+fill_rect per span. An undo record is just (region id, previous colour).
+Variants named <id>_WxH.png are skipped because the game only loads <id>.png.
+
+Prereqs:
+  python3 -m pip install --user numpy pillow
+
+Usage:
+  python3 tools/label_regions.py [templates or folders ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import re
+import time
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+TEMPLATES = ROOT / "assets" / "textures" / "coloring_templates"
+REGIONS_VERSION = 1
+# ColoringGame._colors_match treats channels within 0.02 as equal.
+OUTLINE_MAX = int(0.02 * 255)
+_SKIP_RE = re.compile(r"(_\d+x\d+|\.regions|_thumb)$")
+
+
+def template_files(paths: list[pathlib.Path]) -> list[pathlib.Path]:
+    files: list[pathlib.Path] = []
+    for p in paths:
+        files.extend(sorted(p.glob("*.png")) if p.is_dir() else [p])
+    return [f for f in files if not _SKIP_RE.search(f.stem)]
+
+
+def fillable_mask(im: Image.Image) -> np.ndarray:
+    rgb = np.asarray(im.convert("RGB"))
+    return ~(rgb <= OUTLINE_MAX).all(axis=2)
+
+
+def row_runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, start, end) of every horizontal run of True, in raster order."""
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rs, xs = np.nonzero(edges == 1)
+    _, xe = np.nonzero(edges == -1)
+    return rs, xs, xe
+
+
+def union_runs(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray, width: int) -> np.ndarray:
+    """Root run index per run, joining runs that touch across adjacent rows."""
+    stride = width + 1
+    gs = rows * stride + starts
+    ge = rows * stride + ends
+    # Runs on row+1 overlapping [start, end): ge > query start and gs < query end.
+    lo = np.searchsorted(ge, gs + stride, side="right")
+    hi = np.searchsorted(gs, ge + stride, side="left")
+    counts = np.maximum(hi - lo, 0)
+    u = np.repeat(np.arange(len(rows)), counts)
+    v = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+
+    parent = np.arange(len(rows))
+    while True:
+        pu, pv = parent[u], parent[v]
+        differ = pu != pv
+        if not differ.any():
+            return parent
+        np.minimum.at(parent, np.maximum(pu, pv)[differ], np.minimum(pu, pv)[differ])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+
+def label_template(im: Image.Image) -> tuple[np.ndarray, list[dict[str, Any]]]:
+    """(h, w) int32 label map and per-region metadata, ids in raster order of first pixel."""
+    mask = fillable_mask(im)
+    h, w = mask.shape
+    rows, starts, ends = row_runs(mask)
+    roots = union_runs(rows, starts, ends, w)
+    _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), np.int64)
+    rank[np.argsort(first)] = np.arange(1, len(first) + 1)
+    run_id = rank[inverse]
+
+    flat = np.zeros(h * w + 1, np.int64)
+    np.add.at(flat, rows * w + starts, run_id)
+    np.add.at(flat, rows * w + ends, -run_id)
+    labels = np.cumsum(flat[:-1]).reshape(h, w).astype(np.int32)
+
+    order = np.argsort(run_id, kind="stable")
+    bounds = np.flatnonzero(np.diff(run_id[order])) + 1
+    regions = []
+    for group in np.split(order, bounds):
+        r, s, e = rows[group], starts[group], ends[group]
+        regions.append({
+            "id": int(run_id[group[0]]),
+            "bbox": [int(s.min()), int(r.min()), int(e.max()), int(r.max()) + 1],
+            "pixels": int((e - s).sum()),
+            "spans": np.column_stack([r, s, e]).ravel().tolist(),
+        })
+    return labels, regions
+
+
+def encode_labels(labels: np.ndarray) -> tuple[Image.Image, str]:
+    if labels.max() < 256:
+        return Image.fromarray(labels.astype(np.uint8), "L"), "L8"
+    rgb = np.stack([(labels >> shift) & 0xFF for shift in (0, 8, 16)], axis=-1).astype(np.uint8)
+    return Image.fromarray(rgb, "RGB"), "RGB8"
+
+
+def write_regions(path: pathlib.Path) -> tuple[int, float]:
+    """Label one template; returns (region count, seconds spent labelling)."""
+    with Image.open(path) as im:
+        im.load()
+    t0 = time.perf_counter()
+    labels, regions = label_template(im)
+    elapsed = time.perf_counter() - t0
+    img, encoding = encode_labels(labels)
+    meta = {"version": REGIONS_VERSION, "size": list(im.size), "encoding": encoding, "regions": regions}
+    for out, write in (
+        (path.with_name(f"{path.stem}.regions.png"), lambda tmp: img.save(tmp, format="PNG", optimize=True)),
+        (path.with_name(f"{path.stem}.regions.json"),
+         lambda tmp: tmp.write_text(json.dumps(meta, separators=(",", ":")) + "\n", encoding="utf-8")),
+    ):
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        write(tmp)
+        os.replace(tmp, out)
+    return len(regions), elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Write region label maps for coloring templates")
+    ap.add_argument("paths", nargs="*", help="Template PNGs or folders (default: coloring_templates)")
+    args = ap.parse_args()
+
+    files = template_files([pathlib.Path(p) for p in args.paths] or [TEMPLATES])
+    if not files:
+        raise SystemExit("No templates found")
+    for f in files:
+        n, elapsed = write_regions(f)
+        print(f"{f.name}: {n} regions in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
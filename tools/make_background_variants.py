@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Build 720p/540p variants of every background plus a density manifest.
+
+Backgrounds are authored at 1080p (1080x1920 portrait, 1920x1080 for the
+find_tap scenes). On the 2 GB / Adreno 506 class devices in PERFORMANCE.md,
+decoding the full-size texture wastes memory on screens that cannot show
+the detail. For each master this tool writes
+
+  bg_piano_1080x1920.png -> bg_piano_1080x1920_720p.png (720x1280)
+                         -> bg_piano_1080x1920_540p.png (540x960)
+
+using a high-quality LANCZOS downscale from the master (never tier to tier).
+Masters are processed in parallel on a process pool. Variants newer than
+their master are skipped unless --force is given.
+
+assets/textures/backgrounds.json maps each master's res:// path to its
+tiers, including per-tier sizes and decoded memory. A run over some paths
+only updates those masters' entries and drops entries whose master is gone.
+It also carries selection rules, which scripts/components/TieredBackground.gd
+applies at runtime: the first tier whose max_screen_short_side and
+max_memory_mb both allow the device (screen short side in pixels,
+OS.get_memory_info()["physical"] in MB) is used, falling back to the master
+tier. Scenes give that node the master's path rather than a texture.
+
+Prereqs:
+  python3 -m pip install --user pillow
+
+Usage:
+  python3 tools/make_background_variants.py [--jobs N] [--force] [paths ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from PIL import Image
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+TEXTURES = ROOT / "assets" / "textures"
+MANIFEST_PATH = TEXTURES / "backgrounds.json"
+MANIFEST_VERSION = 1
+MASTER_SHORT_SIDE = 1080
+
+# name -> (short side, selection limits); checked smallest first.
+TIERS: dict[str, dict[str, int]] = {
+    "540p": {"short_side": 540, "max_screen_short_side": 600, "max_memory_mb": 2048},
+    "720p": {"short_side": 720, "max_screen_short_side": 800, "max_memory_mb": 3072},
+}
+
+
+def variant_path(master: pathlib.Path, tier: str) -> pathlib.Path:
+    return master.with_name(f"{master.stem}_{tier}{master.suffix}")
+
+
+def is_variant(path: pathlib.Path) -> bool:
+    return any(path.stem.endswith(f"_{tier}") for tier in TIERS)
+
+
+def find_masters(paths: list[pathlib.Path]) -> list[pathlib.Path]:
+    """PNG backgrounds whose short side is the 1080p master size."""
+    candidates: list[pathlib.Path] = []
+    for p in paths:
+        candidates.extend(sorted(p.rglob("*.png")) if p.is_dir() else [p])
+    masters = []
+    for p in candidates:
+        if is_variant(p):
+            continue
+        with Image.open(p) as im:
+            if min(im.size) == MASTER_SHORT_SIDE:
+                masters.append(p)
+    return masters
+
+
+def tier_size(size: tuple[int, int], short_side: int) -> tuple[int, int]:
+    w, h = size
+    scale = short_side / min(w, h)
+    return round(w * scale), round(h * scale)
+
+
+def decoded_bytes(size: tuple[int, int], mipmaps: bool = False) -> int:
+    """RGBA8 bytes once uploaded; mipmaps add a third."""
+    n = size[0] * size[1] * 4
+    return n * 4 // 3 if mipmaps else n
+
+
+def res_path(path: pathlib.Path) -> str:
+    return "res://" + path.resolve().relative_to(ROOT).as_posix()
+
+
+def _variant_job(job: tuple[str, bool]) -> tuple[str, dict[str, Any], int]:
+    src, force = job
+    master = pathlib.Path(src)
+    written = 0
+    with Image.open(master) as im:
+        im.load()
+        tiers: dict[str, Any] = {"1080p": {"path": res_path(master), "size": list(im.size),
+                                           "decoded_bytes": decoded_bytes(im.size)}}
+        mtime = master.stat().st_mtime
+        for name, tier in TIERS.items():
+            out = variant_path(master, name)
+            size = tier_size(im.size, tier["short_side"])
+            if force or not out.exists() or out.stat().st_mtime < mtime:
+                # reducing_gap: box-reduce by an integer factor first, then LANCZOS; same quality, less work.
+                small = im.resize(size, Image.LANCZOS, reducing_gap=3.0)
+                tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+                small.save(tmp, format="PNG", optimize=True)
+                os.replace(tmp, out)
+                written += 1
+            tiers[name] = {"path": res_path(out), "size": list(size), "decoded_bytes": decoded_bytes(size)}
+    return res_path(master), tiers, written
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Generate 720p/540p background variants and backgrounds.json")
+    ap.add_argument("paths", nargs="*", help="Background PNGs or folders (default: assets/textures)")
+    ap.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="Rebuild variants even if up to date")
+    ap.add_argument("--manifest", default=str(MANIFEST_PATH), help="Output manifest path")
+    args = ap.parse_args()
+
+    masters = find_masters([pathlib.Path(p) for p in args.paths] or [TEXTURES])
+    if not masters:
+        raise SystemExit("No 1080p backgrounds found")
+
+    manifest_path = pathlib.Path(args.manifest)
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+    backgrounds: dict[str, Any] = {}
+    if previous.get("version") == MANIFEST_VERSION:
+        # Keep entries for masters outside the given paths, dropping ones whose master is gone.
+        backgrounds = {k: v for k, v in previous.get("backgrounds", {}).items()
+                       if (ROOT / k.removeprefix("res://")).exists()}
+
+    t0 = time.perf_counter()
+    processed: list[str] = []
+    written = 0
+    with ProcessPoolExecutor(max_workers=args.jobs or os.cpu_count()) as pool:
+        for master, tiers, n in pool.map(_variant_job, [(str(m), args.force) for m in masters]):
+            backgrounds[master] = tiers
+            processed.append(master)
+            written += n
+    elapsed = time.perf_counter() - t0
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "default_tier": "1080p",
+        "tiers": [{"name": name, **tier} for name, tier in TIERS.items()],
+        "backgrounds": backgrounds,
+    }
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, manifest_path)
+
+    print(f"{len(masters)} backgrounds, {written} variants written in {elapsed:.2f}s -> {manifest_path}")
+    report = [backgrounds[m] for m in processed]
+    full = sum(b["1080p"]["decoded_bytes"] for b in report)
+    print(f"{'tier':>6s} {'per bg (MB)':>12s} {'all bgs (MB)':>13s} {'saving':>7s}")
+    for name in ["1080p", *TIERS]:
+        total = sum(b[name]["decoded_bytes"] for b in report)
+        print(f"{name:>6s} {total / len(report) / 2**20:12.2f} {total / 2**20:13.2f} {100 * (1 - total / full):6.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Pack sprite families into texture atlases with Godot AtlasTexture output.
+
+Sprites are grouped per directory (or by a JSON groups file) and packed with
+the MaxRects algorithm (no rotation) into the smallest page that holds them.
+Page sides are multiples of 4 so ETC2/ASTC compression stays block aligned;
+--pot restricts them to powers of two. Anything that does not fit a
+--max-size page spills onto extra pages.
+Each sprite gets an edge-extruded border (--extrude) plus --padding so
+filtering and mipmaps don't bleed neighbours into each other.
+
+For group <name> the packer writes, under --out:
+
+  <name>.png (or <name>_<page>.png)   atlas page(s)
+  <name>.json                         regions: {sprite: {page, region, margin}}
+  <name>/<sprite>.tres                AtlasTexture per sprite (--format tres|both)
+
+A scene swaps `load("res://.../icon_komodo_256.png")` for
+`load("res://assets/textures/atlases/<name>/icon_komodo_256.tres")`. The
+AtlasTexture keeps the original texture size: `margin` restores transparent
+borders removed by trim_sprites.py (*.trim.json sidecars) or by --trim.
+
+Prereqs:
+  python3 -m pip install --user numpy pillow
+
+Usage:
+  python3 tools/pack_atlas.py assets/textures/games/piano assets/textures/games/rhythm
+  python3 tools/pack_atlas.py --groups atlas_groups.json [--out DIR] [--max-size 2048] [--trim 2]
+
+atlas_groups.json maps group names to glob patterns relative to the project:
+  {"piano": ["assets/textures/games/piano/icon_*_256.png"]}
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from trim_sprites import load_meta, trim_image
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DEFAULT_OUT = ROOT / "assets" / "textures" / "atlases"
+
+Rect = tuple[int, int, int, int]  # x, y, w, h
+
+
+class MaxRects:
+    """MaxRects bin (Jukka Jylänki) with best-short-side-fit or bottom-left placement."""
+
+    def __init__(self, width: int, height: int, rule: str = "bssf"):
+        self.width = width
+        self.height = height
+        self.rule = rule
+        self.free: list[Rect] = [(0, 0, width, height)]
+
+    def insert(self, w: int, h: int) -> tuple[int, int] | None:
+        best: tuple[int, int] | None = None
+        best_key: tuple[int, int] | None = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                if self.rule == "bl":
+                    key = (fy + h, fx)
+                else:
+                    dx, dy = fw - w, fh - h
+                    key = (min(dx, dy), max(dx, dy))
+                if best_key is None or key < best_key:
+                    best, best_key = (fx, fy), key
+        if best is not None:
+            self._split((best[0], best[1], w, h))
+        return best
+
+    def _split(self, used: Rect) -> None:
+        ux, uy, uw, uh = used
+        out: list[Rect] = []
+        for f in self.free:
+            fx, fy, fw, fh = f
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                out.append(f)
+                continue
+            if ux > fx:
+                out.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                out.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                out.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                out.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        # Drop free rects fully contained in another one.
+        self.free = [a for i, a in enumerate(out)
+                     if not any(i != j and _contains(b, a) and (b != a or j < i) for j, b in enumerate(out))]
+
+
+def _contains(a: Rect, b: Rect) -> bool:
+    return a[0] <= b[0] and a[1] <= b[1] and a[0] + a[2] >= b[0] + b[2] and a[1] + a[3] >= b[1] + b[3]
+
+
+@dataclass
+class Sprite:
+    name: str
+    path: pathlib.Path
+    image: Image.Image
+    margin: tuple[int, int, int, int]  # Godot AtlasTexture margin: offset x, y, extra w, h
+    page: int = -1
+    x: int = 0
+    y: int = 0
+
+
+def load_sprite(path: pathlib.Path, trim_pad: int | None) -> Sprite:
+    with Image.open(path) as im:
+        im = im.convert("RGBA")
+    canvas = im.size
+    offset = (0, 0)
+    meta = load_meta(path)
+    if meta and list(meta.get("size", [])) == list(im.size):
+        canvas, offset = tuple(meta["canvas"]), tuple(meta["offset"])
+    if trim_pad is not None:
+        cropped, box = trim_image(im, trim_pad)
+        if box is not None:
+            im = cropped
+            offset = (offset[0] + box[0], offset[1] + box[1])
+    w, h = im.size
+    return Sprite(path.stem, path, im, (offset[0], offset[1], canvas[0] - w, canvas[1] - h))
+
+
+def _round4(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _place(todo: list[Sprite], width: int, height: int, cell: int, padding: int,
+           rule: str) -> list[tuple[Sprite, tuple[int, int]]]:
+    # Each sprite takes its size + cell; the bin is `padding` larger than the
+    # page so the trailing gap of the last row/column may hang off the edge.
+    bin_ = MaxRects(width + padding, height + padding, rule)
+    placed = []
+    for s in todo:
+        pos = bin_.insert(s.image.size[0] + cell, s.image.size[1] + cell)
+        if pos is not None:
+            placed.append((s, pos))
+    return placed
+
+
+def _best_page(todo: list[Sprite], cell: int, padding: int, max_size: int,
+               pot: bool) -> tuple[tuple[int, int], list[tuple[Sprite, tuple[int, int]]]] | None:
+    """Smallest page (by area, then squareness) that holds every sprite, or None."""
+    area = sum((s.image.size[0] + cell - padding) * (s.image.size[1] + cell - padding) for s in todo)
+    min_w = max(s.image.size[0] for s in todo) + cell - padding
+    best = None
+    if pot:
+        sides = [1 << i for i in range(4, max_size.bit_length()) if (1 << i) <= max_size]
+        sizes = sorted(((w, h) for w in sides for h in sides if w * h >= area and w >= min_w),
+                       key=lambda sz: (sz[0] * sz[1], abs(sz[0] - sz[1])))
+        for w, h in sizes:
+            for rule in ("bssf", "bl"):
+                placed = _place(todo, w, h, cell, padding, rule)
+                if len(placed) == len(todo):
+                    return (w, h), placed
+        return None
+    for w in range(_round4(min_w), max_size + 1, 4):
+        if best is not None and w * _round4(min_w) >= best[0][0] * best[0][1]:
+            break
+        for rule in ("bl", "bssf"):
+            placed = _place(todo, w, max_size, cell, padding, rule)
+            if len(placed) < len(todo):
+                continue
+            h = _round4(max(y + s.image.size[1] + cell - padding for s, (_, y) in placed))
+            key = (w * h, abs(w - h))
+            if best is None or key < (best[0][0] * best[0][1], abs(best[0][0] - best[0][1])):
+                best = ((w, h), placed)
+    return best
+
+
+def pack(sprites: list[Sprite], extrude: int, padding: int, max_size: int, pot: bool = False) -> list[tuple[int, int]]:
+    """Assign page/x/y to every sprite; returns the page sizes."""
+    cell = 2 * extrude + padding
+    todo = sorted(sprites, key=lambda s: (max(s.image.size), s.image.size[0] * s.image.size[1]), reverse=True)
+    pages: list[tuple[int, int]] = []
+    while todo:
+        found = _best_page(todo, cell, padding, max_size, pot)
+        if found is not None:
+            size, placed = found
+        else:
+            # Nothing holds the rest: fill one max-size page and continue on the next.
+            size = (max_size, max_size)
+            placed = _place(todo, max_size, max_size, cell, padding, "bssf")
+            if not placed:
+                raise SystemExit(f"{todo[0].path} does not fit a {max_size}px atlas page")
+        for s, (x, y) in placed:
+            s.page, s.x, s.y = len(pages), x, y
+        pages.append(size)
+        done = {id(s) for s, _ in placed}
+        todo = [s for s in todo if id(s) not in done]
+    return pages
+
+
+def render_page(sprites: list[Sprite], size: tuple[int, int], extrude: int) -> Image.Image:
+    page = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+    for s in sprites:
+        px = np.asarray(s.image)
+        if extrude:
+            px = np.pad(px, ((extrude, extrude), (extrude, extrude), (0, 0)), mode="edge")
+        h, w = px.shape[:2]
+        page[s.y:s.y + h, s.x:s.x + w] = px
+    return Image.fromarray(page, "RGBA")
+
+
+def res_path(path: pathlib.Path) -> str:
+    try:
+        return "res://" + path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.resolve().as_posix()
+
+
+def atlas_tres(atlas_res: str, region: Rect, margin: tuple[int, int, int, int]) -> str:
+    lines = [
+        '[gd_resource type="AtlasTexture" load_steps=2 format=3]',
+        "",
+        f'[ext_resource type="Texture2D" path="{atlas_res}" id="1"]',
+        "",
+        "[resource]",
+        'atlas = ExtResource("1")',
+        "region = Rect2(%d, %d, %d, %d)" % region,
+    ]
+    if any(margin):
+        lines.append("margin = Rect2(%d, %d, %d, %d)" % margin)
+    return "\n".join(lines) + "\n"
+
+
+def _write(path: pathlib.Path, data: str | bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data.encode("utf-8") if isinstance(data, str) else data)
+    os.replace(tmp, path)
+
+
+def pack_group(name: str, files: list[pathlib.Path], out_dir: pathlib.Path, *, max_size: int = 2048,
+               padding: int = 2, extrude: int = 1, trim_pad: int | None = None, pot: bool = False,
+               fmt: str = "both") -> dict[str, Any]:
+    sprites = [load_sprite(f, trim_pad) for f in files]
+    pages = pack(sprites, extrude, padding, max_size, pot)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    page_paths = [out_dir / (f"{name}.png" if len(pages) == 1 else f"{name}_{i}.png") for i in range(len(pages))]
+    for i, (size, path) in enumerate(zip(pages, page_paths)):
+        img = render_page([s for s in sprites if s.page == i], size, extrude)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        img.save(tmp, format="PNG", optimize=True)
+        os.replace(tmp, path)
+
+    frames: dict[str, Any] = {}
+    if fmt in ("tres", "both"):
+        (out_dir / name).mkdir(exist_ok=True)
+    for s in sorted(sprites, key=lambda s: s.name):
+        region = (s.x + extrude, s.y + extrude, *s.image.size)
+        frames[s.name] = {"page": s.page, "source": res_path(s.path), "region": list(region), "margin": list(s.margin)}
+        if fmt in ("tres", "both"):
+            _write(out_dir / name / f"{s.name}.tres", atlas_tres(res_path(page_paths[s.page]), region, s.margin))
+
+    source_px = sum(s.image.size[0] * s.image.size[1] for s in sprites)
+    original_px = sum((s.image.size[0] + s.margin[2]) * (s.image.size[1] + s.margin[3]) for s in sprites)
+    atlas_px = sum(w * h for w, h in pages)
+    stats = {
+        "sprites": len(sprites),
+        "pages": [list(p) for p in pages],
+        "efficiency": round(source_px / atlas_px, 4),
+        "texture_px_before": original_px,
+        "texture_px_after": atlas_px,
+    }
+    if fmt in ("json", "both"):
+        meta = {"version": 1, "pages": [res_path(p) for p in page_paths], "frames": frames, "stats": stats}
+        _write(out_dir / f"{name}.json", json.dumps(meta, indent=1, sort_keys=True) + "\n")
+    return stats
+
+
+def collect_groups(args: argparse.Namespace) -> dict[str, list[pathlib.Path]]:
+    groups: dict[str, list[pathlib.Path]] = {}
+    if args.groups:
+        spec = json.loads(pathlib.Path(args.groups).read_text(encoding="utf-8"))
+        for name, patterns in spec.items():
+            files = sorted({p for pat in patterns for p in ROOT.glob(pat)})
+            groups[name] = files
+    for d in map(pathlib.Path, args.paths):
+        files = sorted(p for p in d.glob(args.glob) if p.is_file())
+        rel = d.resolve().relative_to(ROOT) if d.resolve().is_relative_to(ROOT) else pathlib.Path(d.name)
+        name = "_".join(part for part in rel.parts if part not in {"assets", "textures", "games"}) or d.name
+        groups[name] = files
+    return groups
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Pack sprites into atlases with Godot AtlasTexture resources")
+    ap.add_argument("paths", nargs="*", help="Sprite folders; each becomes one group")
+    ap.add_argument("--groups", default=None, help="JSON file mapping group names to glob patterns")
+    ap.add_argument("--glob", default="*.png", help="Sprite filter inside folders (default: *.png)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help="Output folder (default: assets/textures/atlases)")
+    ap.add_argument("--max-size", type=int, default=2048, help="Largest atlas page side")
+    ap.add_argument("--pot", action="store_true", help="Power-of-two page sizes only")
+    ap.add_argument("--max-sprite", type=int, default=512, help="Leave sprites larger than this out of atlases")
+    ap.add_argument("--padding", type=int, default=2, help="Empty pixels between sprites")
+    ap.add_argument("--extrude", type=int, default=1, help="Edge pixels repeated around each sprite")
+    ap.add_argument("--trim", type=int, default=None, metavar="PAD", help="Crop transparent margins inside the atlas")
+    ap.add_argument("--format", choices=["tres", "json", "both"], default="both")
+    args = ap.parse_args()
+    if not args.paths and not args.groups:
+        ap.error("give sprite folders and/or --groups")
+    if args.max_size % 4 or (args.pot and args.max_size & (args.max_size - 1)):
+        ap.error("--max-size must be a multiple of 4 (a power of two with --pot)")
+
+    out_dir = pathlib.Path(args.out)
+    t0 = time.perf_counter()
+    total_before = total_after = 0
+    for name, files in collect_groups(args).items():
+        keep = []
+        for f in files:
+            with Image.open(f) as im:
+                if max(im.size) <= args.max_sprite:
+                    keep.append(f)
+                else:
+                    print(f"  skip {f} ({im.size[0]}x{im.size[1]} > --max-sprite)")
+        if len(keep) < 2:
+            print(f"{name}: fewer than 2 sprites, nothing to pack")
+            continue
+        st = pack_group(name, keep, out_dir, max_size=args.max_size, padding=args.padding,
+                        extrude=args.extrude, trim_pad=args.trim, pot=args.pot, fmt=args.format)
+        total_before += len(keep)
+        total_after += len(st["pages"])
+        sizes = ", ".join(f"{w}x{h}" for w, h in st["pages"])
+        print(f"{name}: {st['sprites']} textures -> {len(st['pages'])} ({sizes}), "
+              f"efficiency {100 * st['efficiency']:.0f}%, texture memory "
+              f"{st['texture_px_before'] * 4 / 1e6:.2f} -> {st['texture_px_after'] * 4 / 1e6:.2f} MB")
+    print(f"Total: {total_before} textures -> {total_after} atlas pages in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
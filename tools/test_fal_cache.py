@@ -0,0 +1,36 @@
+"""Both fal generators must hit the same cache entry for the same asset.
+
+Run with: python3 -m pytest tools/test_fal_cache.py
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+
+import pytest
+
+import fal_cache
+import generate_assets_falai
+import generate_assets_falai_http
+
+MANIFESTS = sorted(pathlib.Path(__file__).parent.glob("fal_ai_asset_manifest*.json"))
+
+
+@pytest.mark.parametrize("model", ["fal-ai/flux-pro/v1.1-ultra", "fal-ai/gpt-image-1.5"])
+@pytest.mark.parametrize("manifest_path", MANIFESTS, ids=lambda p: p.stem)
+def test_scripts_share_keys(manifest_path: pathlib.Path, model: str) -> None:
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["style"]["model"] = model
+    jobs = generate_assets_falai_http.plan_jobs(manifest, None)
+    assert len(jobs) == len(manifest["assets"])
+    for asset, job in zip(manifest["assets"], jobs):
+        assert job.cache_key == generate_assets_falai.asset_key(model, asset), asset["id"]
+
+
+def test_key_inputs() -> None:
+    key = fal_cache.job_key("m", "a cat", None, "1:1")
+    assert key == fal_cache.job_key("m", "a cat", "", "1:1")
+    assert key != fal_cache.job_key("m", "a cat", "dogs", "1:1")
+    assert key != fal_cache.job_key("m", "a cat", None, "16:9")
+    assert key != fal_cache.job_key("other", "a cat", None, "1:1")
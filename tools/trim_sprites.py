@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Crop transparent margins off sprite PNGs, keeping layout metadata.
+
+Each PNG is cropped to the bounding box of its pixels with alpha above
+--threshold, plus --pad pixels, computed with vectorized row/column
+reductions. A sidecar `<stem>.trim.json` next to the PNG records the
+original canvas size and where the cropped image sits on it:
+
+  {"version": 1, "canvas": [256, 256], "offset": [12, 8], "size": [232, 240]}
+
+A scene can therefore place the trimmed texture at `offset` inside a
+`canvas`-sized box and keep its old layout. Re-trimming a trimmed sprite
+composes with the existing sidecar, so `canvas` always refers to the
+original image. Images with nothing to crop (opaque backgrounds) are left
+untouched and get no sidecar.
+
+Used by generate_pastel_assets_stage2.py and the fal generators (--trim-pad),
+or on its own across an asset tree with a process pool:
+
+Prereqs:
+  python3 -m pip install --user numpy pillow
+
+Usage:
+  python3 tools/trim_sprites.py assets/textures/games/find_tap assets/textures/games/tappop
+  python3 tools/trim_sprites.py [--pad 2] [--threshold 0] [--jobs N] [--dry-run] path ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+TRIM_VERSION = 1
+DEFAULT_PAD = 2
+
+
+def sidecar_path(path: pathlib.Path) -> pathlib.Path:
+    return path.with_name(f"{path.stem}.trim.json")
+
+
+def alpha_bbox(alpha: np.ndarray, threshold: int = 0) -> tuple[int, int, int, int] | None:
+    """(x0, y0, x1, y1) half-open bounding box of alpha > threshold, or None if fully transparent."""
+    mask = alpha > threshold
+    cols = np.flatnonzero(mask.any(axis=0))
+    if len(cols) == 0:
+        return None
+    rows = np.flatnonzero(mask.any(axis=1))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def trim_image(im: Image.Image, pad: int = DEFAULT_PAD,
+               threshold: int = 0) -> tuple[Image.Image, tuple[int, int, int, int] | None]:
+    """Return (cropped image, crop box) or (im, None) when there is nothing to crop."""
+    if im.mode != "RGBA":
+        if "A" not in im.getbands() and "transparency" not in im.info:
+            return im, None
+        im = im.convert("RGBA")
+    w, h = im.size
+    bbox = alpha_bbox(np.asarray(im.getchannel("A")), threshold)
+    if bbox is None:
+        return im, None
+    x0, y0, x1, y1 = bbox
+    box = (max(0, x0 - pad), max(0, y0 - pad), min(w, x1 + pad), min(h, y1 + pad))
+    if box == (0, 0, w, h):
+        return im, None
+    return im.crop(box), box
+
+
+def merge_meta(box: tuple[int, int, int, int], size: tuple[int, int],
+               previous: dict[str, Any] | None) -> dict[str, Any]:
+    x0, y0, x1, y1 = box
+    canvas, offset = list(size), [x0, y0]
+    if previous and previous.get("version") == TRIM_VERSION and list(previous.get("size", [])) == list(size):
+        canvas = list(previous["canvas"])
+        offset = [previous["offset"][0] + x0, previous["offset"][1] + y0]
+    return {"version": TRIM_VERSION, "canvas": canvas, "offset": offset, "size": [x1 - x0, y1 - y0]}
+
+
+def load_meta(path: pathlib.Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(sidecar_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(path: pathlib.Path, meta: dict[str, Any]) -> None:
+    side = sidecar_path(path)
+    tmp = side.with_name(f".{side.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, separators=(",", ":")) + "\n", encoding="utf-8")
+    os.replace(tmp, side)
+
+
+def trim_png_bytes(data: bytes, pad: int = DEFAULT_PAD, threshold: int = 0,
+                   previous: dict[str, Any] | None = None) -> tuple[bytes, dict[str, Any] | None]:
+    """In-memory variant for generators: returns (PNG bytes, sidecar meta or None)."""
+    with Image.open(io.BytesIO(data)) as im:
+        cropped, box = trim_image(im, pad, threshold)
+        if box is None:
+            return data, None
+        out = io.BytesIO()
+        cropped.save(out, format="PNG")
+        return out.getvalue(), merge_meta(box, im.size, previous)
+
+
+def trim_file(path: pathlib.Path, pad: int = DEFAULT_PAD, threshold: int = 0,
+              dry_run: bool = False) -> tuple[int, int]:
+    """Trim one PNG in place; returns (pixels before, pixels after)."""
+    with Image.open(path) as im:
+        im.load()
+    cropped, box = trim_image(im, pad, threshold)
+    before = im.size[0] * im.size[1]
+    if box is None:
+        return before, before
+    if not dry_run:
+        meta = merge_meta(box, im.size, load_meta(path))
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        cropped.save(tmp, format="PNG")
+        os.replace(tmp, path)
+        write_meta(path, meta)
+    return before, cropped.size[0] * cropped.size[1]
+
+
+def _trim_job(job: tuple[str, int, int, bool]) -> tuple[str, int, int]:
+    src, pad, threshold, dry_run = job
+    before, after = trim_file(pathlib.Path(src), pad, threshold, dry_run)
+    return src, before, after
+
+
+def trim_tree(paths: list[pathlib.Path], pad: int = DEFAULT_PAD, threshold: int = 0, jobs: int | None = None,
+              dry_run: bool = False, verbose: bool = True) -> tuple[int, int, int]:
+    """Trim every PNG under paths on a process pool; returns (files trimmed, pixels before, pixels after)."""
+    files: list[pathlib.Path] = []
+    for p in paths:
+        files.extend(sorted(p.rglob("*.png")) if p.is_dir() else [p])
+    trimmed = total_before = total_after = 0
+    work = [(str(f), pad, threshold, dry_run) for f in files]
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        for src, before, after in pool.map(_trim_job, work, chunksize=4):
+            total_before += before
+            total_after += after
+            if after != before:
+                trimmed += 1
+                if verbose:
+                    print(f"Trimmed: {src} ({before} -> {after} px, -{100 * (1 - after / before):.0f}%)")
+    return trimmed, total_before, total_after
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Crop transparent sprite margins and write *.trim.json sidecars")
+    ap.add_argument("paths", nargs="+", help="PNG files or folders (scanned recursively)")
+    ap.add_argument("--pad", type=int, default=DEFAULT_PAD, help="Transparent pixels kept around the content")
+    ap.add_argument("--threshold", type=int, default=0, help="Alpha values <= this count as transparent")
+    ap.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    ap.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    args = ap.parse_args()
+    if args.pad < 0 or not 0 <= args.threshold < 255:
+        ap.error("need --pad >= 0 and 0 <= --threshold < 255")
+
+    t0 = time.perf_counter()
+    n, before, after = trim_tree([pathlib.Path(p) for p in args.paths], args.pad, args.threshold,
+                                 args.jobs, args.dry_run)
+    saved = 100 * (1 - after / before) if before else 0.0
+    print(f"{'Would trim' if args.dry_run else 'Trimmed'} {n} files: {before * 4 / 1e6:.1f} MB -> "
+          f"{after * 4 / 1e6:.1f} MB of RGBA texture memory (-{saved:.0f}%) in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -12,18 +12,55 @@ Usage:
     "Mobil" "Cari Mobil" "Tap Mobil" "Pintar!" "Coba lagi"
 
 Outputs WAV files (Godot-friendly). You can later convert to OGG if desired.
+
+By default lines are streamed to a pool of long-lived Piper processes
+(`--json-input` mode), so the ONNX model is loaded once per worker instead
+of once per line. `--workers` sets the pool size (default: one per core, capped
+at the number of lines); `--mode spawn` runs the old one-process-per-line path.
+`--benchmark` runs both into a temp folder and prints lines/second for each.
+
+Synthesized clips are stored once in a content-addressed cache
+(tools/tts/cache/<sha256>.wav) keyed on the normalized text, the model
+digest, --speaker and, in stream mode, the conversion settings (--rate,
+--trim), and materialized into --out by hard link (or copy). A manifest in the output folder (tts_manifest.json) maps each slug to
+its text and hash; two different texts that slugify to the same filename are
+reported instead of silently overwriting each other. Re-running after a
+one-word change therefore synthesizes only that word.
+
+`--mode stream` writes each clip to disk once: every persistent worker gets a
+named pipe as its Piper output file, and the WAV read back from the pipe is
+sent in memory through the converter's downmix, resample (--rate), scale and
+trim (--trim) stages before the final Godot-ready WAV is written into the
+cache. `--index` then updates a duration/loudness sidecar for the clips (see
+convert_wav_pcm_to_16bit_mono.py). Requires numpy and a POSIX system.
+
+  python3 tools/tts_generate_id_piper.py --mode stream --trim --out assets/sounds/words/id/transport \
+    --index assets/sounds/clip_index.json "Mobil" "Cari Mobil"
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
 import pathlib
 import re
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 ROOT = pathlib.Path(__file__).resolve().parents[0]
 PIPER_BIN = ROOT / "tts" / "piper" / "piper" / "piper"
 MODEL = ROOT / "tts" / "models" / "id_ID" / "news_tts" / "medium" / "id_ID-news_tts-medium.onnx"
+CACHE_DIR = ROOT / "tts" / "cache"
+MANIFEST_NAME = "tts_manifest.json"
+MANIFEST_VERSION = 1
 
 
 def slugify(s: str) -> str:
@@ -34,10 +71,286 @@ def slugify(s: str) -> str:
     return s or "line"
 
 
+def normalize_text(s: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", s).split())
+
+
+def file_digest(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def model_digest() -> str:
+    """Digest of the model weights plus its config (phoneme map, audio settings).
+
+    Hashing the ONNX file takes a while, so the result is kept in
+    CACHE_DIR/model_digest.json and reused while each file's path, size and
+    mtime are unchanged.
+    """
+    files = [MODEL]
+    config = MODEL.with_name(MODEL.name + ".json")
+    if config.exists():
+        files.append(config)
+    stamp = [[str(p), p.stat().st_size, p.stat().st_mtime_ns] for p in files]
+    memo = CACHE_DIR / "model_digest.json"
+    try:
+        cached = json.loads(memo.read_text(encoding="utf-8"))
+        if cached.get("files") == stamp:
+            return cached["digest"]
+    except (OSError, ValueError, KeyError):
+        pass
+    h = hashlib.sha256(file_digest(MODEL).encode())
+    if config.exists():
+        h.update(file_digest(config).encode())
+    digest = h.hexdigest()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = memo.with_name(f"{memo.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"files": stamp, "digest": digest}) + "\n", encoding="utf-8")
+    os.replace(tmp, memo)
+    return digest
+
+
+def cache_key(text: str, model: str, settings: dict[str, Any]) -> str:
+    blob = json.dumps({"text": text, "model": model, **settings}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def load_manifest(out_dir: pathlib.Path) -> dict[str, Any]:
+    try:
+        data = json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("clips", {}) if data.get("version") == MANIFEST_VERSION else {}
+
+
+def save_manifest(out_dir: pathlib.Path, clips: dict[str, Any]) -> None:
+    path = out_dir / MANIFEST_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "clips": clips}, indent=2, sort_keys=True, ensure_ascii=False) + "\n",
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def materialize(src: pathlib.Path, dst: pathlib.Path) -> None:
+    """Place a cached clip at dst, preferring a hard link over a copy."""
+    tmp = dst.with_name(dst.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class PiperWorker:
+    """One Piper process with the model loaded, fed JSON lines on stdin.
+
+    Piper prints the path of each finished WAV on stdout, which is used to
+    wait for completion of every line.
+    """
+
+    def __init__(self, out_dir: pathlib.Path, speaker: int | None = None):
+        cmd = [str(PIPER_BIN), "--model", str(MODEL), "--json-input", "--output_dir", str(out_dir)]
+        self.speaker = speaker
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, encoding="utf-8", bufsize=1)
+
+    def _request(self, text: str, out_path: pathlib.Path) -> None:
+        assert self.proc.stdin is not None
+        request: dict[str, Any] = {"text": text, "output_file": str(out_path)}
+        if self.speaker is not None:
+            request["speaker_id"] = self.speaker
+        self.proc.stdin.write(json.dumps(request, ensure_ascii=False) + "\n")
+        self.proc.stdin.flush()
+
+    def _wait(self) -> bool:
+        assert self.proc.stdout is not None
+        return bool(self.proc.stdout.readline())
+
+    def synthesize(self, text: str, out_path: pathlib.Path) -> None:
+        self._request(text, out_path)
+        if not self._wait():
+            raise RuntimeError(f"piper exited with code {self.proc.poll()} while synthesizing {text!r}")
+
+    def synthesize_bytes(self, text: str, fifo: pathlib.Path) -> bytes:
+        """Synthesize into a named pipe and return the WAV bytes without touching disk."""
+        result: list[bytes] = []
+        reader = threading.Thread(target=lambda: result.append(fifo.read_bytes()))
+        reader.start()
+        self._request(text, fifo)
+        ok = self._wait()
+        if not ok:
+            # Piper died before writing; open the write end so the reader sees EOF.
+            os.close(os.open(fifo, os.O_WRONLY | os.O_NONBLOCK))
+        reader.join()
+        if not ok:
+            raise RuntimeError(f"piper exited with code {self.proc.poll()} while synthesizing {text!r}")
+        return result[0]
+
+    def close(self) -> None:
+        if self.proc.stdin is not None:
+            self.proc.stdin.close()
+        if self.proc.wait(timeout=60) != 0:
+            raise RuntimeError(f"piper exited with code {self.proc.returncode}")
+
+    def __enter__(self) -> "PiperWorker":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if exc[0] is None:
+            self.close()
+        else:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def _run_shard(shard: list[tuple[str, pathlib.Path]], out_dir: pathlib.Path, speaker: int | None) -> int:
+    with PiperWorker(out_dir, speaker) as worker:
+        for line, out_path in shard:
+            worker.synthesize(line, out_path)
+            print(f"Synthesized: {line!r}")
+    return len(shard)
+
+
+def _run_shard_stream(shard: list[tuple[str, pathlib.Path]], out_dir: pathlib.Path, speaker: int | None,
+                      convert: dict[str, Any]) -> int:
+    from convert_wav_pcm_to_16bit_mono import WavReader, convert_reader
+
+    with tempfile.TemporaryDirectory() as tmp, PiperWorker(out_dir, speaker) as worker:
+        fifo = pathlib.Path(tmp) / "piper.wav"
+        os.mkfifo(fifo)
+        for line, out_path in shard:
+            with WavReader(worker.synthesize_bytes(line, fifo)) as w:
+                stats = convert_reader(w, str(out_path), rate=convert.get("rate"), trim=convert.get("trim"),
+                                       name=repr(line))
+            out_path.with_suffix(".json").write_text(json.dumps(stats), encoding="utf-8")
+            print(f"Synthesized: {line!r} ({stats['duration']:.2f}s)")
+    return len(shard)
+
+
+def synthesize_batch(jobs: list[tuple[str, pathlib.Path]], out_dir: pathlib.Path, workers: int,
+                     speaker: int | None = None, convert: dict[str, Any] | None = None) -> None:
+    """Shard the lines round-robin over `workers` persistent Piper processes.
+
+    With `convert`, audio is piped through the converter in memory instead
+    of being written by Piper; each job also gets a <path>.json stats file.
+    """
+    workers = max(1, min(workers, len(jobs)))
+    shards = [jobs[i::workers] for i in range(workers)]
+    if convert is None:
+        run_shard = lambda shard: _run_shard(shard, out_dir, speaker)  # noqa: E731
+    else:
+        run_shard = lambda shard: _run_shard_stream(shard, out_dir, speaker, convert)  # noqa: E731
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run_shard, shards))
+
+
+def synthesize_spawn(jobs: list[tuple[str, pathlib.Path]], speaker: int | None = None) -> None:
+    """Old path: one Piper process (and model load) per line."""
+    for line, out_path in jobs:
+        # Piper reads text from stdin
+        cmd = [str(PIPER_BIN), "--model", str(MODEL), "--output_file", str(out_path)]
+        if speaker is not None:
+            cmd += ["--speaker", str(speaker)]
+        subprocess.run(cmd, input=(line + "\n").encode("utf-8"), check=True)
+        print(f"Synthesized: {line!r}")
+
+
+def synthesize(mode: str, jobs: list[tuple[str, pathlib.Path]], out_dir: pathlib.Path, workers: int,
+               speaker: int | None = None, convert: dict[str, Any] | None = None) -> float:
+    """Synthesize (text, path) jobs; returns lines per second."""
+    if not jobs:
+        return 0.0
+    t0 = time.perf_counter()
+    if mode == "spawn":
+        synthesize_spawn(jobs, speaker)
+    elif mode == "stream":
+        synthesize_batch(jobs, out_dir, workers, speaker, convert or {})
+    else:
+        synthesize_batch(jobs, out_dir, workers, speaker)
+    elapsed = time.perf_counter() - t0
+    rate = len(jobs) / elapsed if elapsed > 0 else float("inf")
+    print(f"[{mode}] {len(jobs)} lines in {elapsed:.2f}s ({rate:.2f} lines/s)")
+    return rate
+
+
+def plan(lines: list[str], out_dir: pathlib.Path, model: str, settings: dict[str, Any],
+         replace: bool) -> dict[str, dict[str, str]]:
+    """Map slug -> {text, hash}; refuse slug collisions between different texts."""
+    clips: dict[str, dict[str, str]] = {}
+    for line in lines:
+        text = normalize_text(line)
+        slug = slugify(text)
+        prev = clips.get(slug)
+        if prev is not None and prev["text"] != text:
+            raise SystemExit(f"Slug collision: {prev['text']!r} and {text!r} both map to {slug}.wav")
+        clips[slug] = {"text": text, "hash": cache_key(text, model, settings)}
+
+    if not replace:
+        for slug, old in load_manifest(out_dir).items():
+            new = clips.get(slug)
+            if new is not None and old.get("text") != new["text"]:
+                raise SystemExit(f"Slug collision with existing clip {slug}.wav ({old.get('text')!r} vs {new['text']!r}); "
+                                 "rename the line or pass --replace")
+    return clips
+
+
+def generate(lines: list[str], out_dir: pathlib.Path, mode: str, workers: int, settings: dict[str, Any],
+             replace: bool = False, index_path: pathlib.Path | None = None) -> None:
+    model = model_digest()
+    clips = plan(lines, out_dir, model, settings, replace)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Synthesize each missing hash once, into a temp name, then publish atomically.
+    texts = {c["hash"]: c["text"] for c in clips.values()}
+    missing = {h: t for h, t in texts.items() if not (CACHE_DIR / f"{h}.wav").exists()}
+    jobs = [(t, CACHE_DIR / f"{h}.partial.wav") for h, t in missing.items()]
+    synthesize(mode, jobs, CACHE_DIR, workers, settings.get("speaker"), settings.get("convert"))
+    for h in missing:
+        stats = CACHE_DIR / f"{h}.partial.json"
+        if stats.exists():
+            os.replace(stats, CACHE_DIR / f"{h}.json")
+        os.replace(CACHE_DIR / f"{h}.partial.wav", CACHE_DIR / f"{h}.wav")
+
+    manifest = load_manifest(out_dir)
+    for slug, clip in clips.items():
+        out_path = out_dir / f"{slug}.wav"
+        if manifest.get(slug, {}).get("hash") != clip["hash"] or not out_path.exists():
+            materialize(CACHE_DIR / f"{clip['hash']}.wav", out_path)
+            print(f"Wrote: {out_path}")
+        manifest[slug] = clip
+    save_manifest(out_dir, manifest)
+    print(f"{len(clips)} clips: {len(missing)} synthesized, {len(clips) - len(missing)} from cache")
+
+    if index_path is not None:
+        from convert_wav_pcm_to_16bit_mono import update_index
+
+        entries = {}
+        for slug, clip in clips.items():
+            stats = CACHE_DIR / f"{clip['hash']}.json"
+            if stats.exists():
+                entries[out_dir / f"{slug}.wav"] = json.loads(stats.read_text(encoding="utf-8"))
+        update_index(index_path, entries)
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--out", required=True, help="Output folder")
-    ap.add_argument("--rate", type=int, default=22050, help="Sample rate")
+    ap.add_argument("--rate", type=int, default=22050, help="Stream mode: output sample rate")
+    ap.add_argument("--speaker", type=int, default=None, help="Speaker id (multi-speaker models)")
+    ap.add_argument("--mode", choices=["batch", "spawn", "stream"], default="batch",
+                    help="batch: persistent Piper workers (default); spawn: one process per line; "
+                         "stream: persistent workers + in-memory conversion")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Piper processes in batch mode")
+    ap.add_argument("--benchmark", action="store_true", help="Run spawn and batch into a temp folder and compare")
+    ap.add_argument("--replace", action="store_true", help="Allow a line to replace a different text with the same slug")
+    ap.add_argument("--trim", action="store_true", help="Stream mode: trim leading/trailing silence")
+    ap.add_argument("--trim-threshold", type=float, default=-50.0, help="Silence threshold in dBFS (window RMS)")
+    ap.add_argument("--trim-pad", type=float, default=30.0, help="Silence kept around the speech, in ms")
+    ap.add_argument("--index", default=None, help="Stream mode: JSON sidecar index to update with clip stats")
     ap.add_argument("lines", nargs="+", help="Text lines")
     args = ap.parse_args()
 
@@ -48,14 +361,27 @@ def main() -> int:
         raise SystemExit(f"Missing piper binary: {PIPER_BIN}")
     if not MODEL.exists():
         raise SystemExit(f"Missing model: {MODEL}")
+    if args.workers <= 0:
+        ap.error("--workers must be positive")
+    if (args.trim or args.index) and args.mode != "stream":
+        ap.error("--trim and --index need --mode stream")
 
-    for line in args.lines:
-        out_path = out_dir / f"{slugify(line)}.wav"
-        # Piper reads text from stdin
-        cmd = [str(PIPER_BIN), "--model", str(MODEL), "--output_file", str(out_path)]
-        subprocess.run(cmd, input=(line + "\n").encode("utf-8"), check=True)
-        print(f"Wrote: {out_path}")
+    if args.benchmark:
+        # Bypasses the cache so both modes really synthesize every line.
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [(normalize_text(line), pathlib.Path(tmp) / f"{i}.wav") for i, line in enumerate(args.lines)]
+            spawn_rate = synthesize("spawn", jobs, pathlib.Path(tmp), args.workers, args.speaker)
+            batch_rate = synthesize("batch", jobs, pathlib.Path(tmp), args.workers, args.speaker)
+        print(f"Speedup: {batch_rate / spawn_rate:.1f}x")
+        return 0
 
+    # --rate only takes effect through the stream converter, so it is keyed there.
+    settings: dict[str, Any] = {"speaker": args.speaker}
+    if args.mode == "stream":
+        trim = {"threshold_db": args.trim_threshold, "pad_ms": args.trim_pad} if args.trim else None
+        settings["convert"] = {"rate": args.rate, "trim": trim}
+    index_path = pathlib.Path(args.index) if args.index else None
+    generate(args.lines, out_dir, args.mode, args.workers, settings, replace=args.replace, index_path=index_path)
     return 0
 
 